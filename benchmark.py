@@ -0,0 +1,93 @@
+import argparse
+import json
+import tempfile
+import threading
+import time
+
+import datascraper
+import metrics
+from browser_profile import BROWSERS, create_driver, create_plain_driver
+from lead_store import LeadStore
+from standin_server import DEFAULT_FIXTURES, PAGE_PATH, create_server
+
+# End-to-end throughput benchmark without cbr.nl: starts the stand-in rijschoolzoeker with the
+# given latency, runs datascraper.process_place for every place in a headless browser against it
+# and reports places per minute and results per second. Run it before and after a change with the
+# same places, latency and browser to see what the change is worth.
+DEFAULT_PLACES = ["Alkmaar", "Amsterdam", "Haarlem", "Zaandam"]
+
+
+def run_benchmark(places, browser="chrome", fixtures_dir=DEFAULT_FIXTURES, latency=0.0, jitter=0.0, rounds=1,
+                  profile="tuned", reuse_page=False):
+    """Scrape places rounds times through the stand-in. Returns the throughput numbers.
+
+    profile is "tuned" for the scraper's own browser profile or "plain" for an untuned headless session.
+    With reuse_page the search page is loaded once and only the place is changed (datascraper --reuse-page).
+    """
+    server = create_server(0, fixtures_dir, latency, jitter)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    datascraper.RIJSCHOOLZOEKER_URL = f"http://127.0.0.1:{server.server_address[1]}{PAGE_PATH}"
+
+    output_dir = tempfile.TemporaryDirectory()
+    datascraper.lead_store = LeadStore(output_dir.name)
+    datascraper.reuse_page = reuse_page
+    driver = create_driver(browser) if profile == "tuned" else create_plain_driver(browser)
+    results_before = metrics.counters["results"]
+    places_done = 0
+    try:
+        start_time = time.time()
+        for _ in range(rounds):
+            for place in places:
+                # Every round scrapes the same schools again, so forget what was saved
+                datascraper.seen_store().clear()
+                with metrics.span("place"):
+                    if datascraper.process_place(driver, place):
+                        places_done += 1
+        elapsed = time.time() - start_time
+    finally:
+        driver.quit()
+        datascraper.lead_store.close()
+        output_dir.cleanup()
+        server.shutdown()
+
+    results = metrics.counters["results"] - results_before
+    return {
+        "browser": browser,
+        "profile": profile,
+        "reuse_page": reuse_page,
+        "latency": latency,
+        "places": places_done,
+        "failed_places": rounds * len(places) - places_done,
+        "results": results,
+        "seconds": round(elapsed, 2),
+        "places_per_minute": round(places_done / elapsed * 60, 2) if elapsed else None,
+        "results_per_second": round(results / elapsed, 2) if elapsed else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark process_place end-to-end against the local stand-in.")
+    parser.add_argument("places", nargs="*", default=DEFAULT_PLACES,
+                        help=f"Places to scrape (default: {' '.join(DEFAULT_PLACES)})")
+    parser.add_argument("--browser", choices=BROWSERS, default="chrome")
+    parser.add_argument("--profile", choices=["tuned", "plain"], default="tuned",
+                        help="Tuned browser profile of the scraper or an untuned headless session (default: tuned)")
+    parser.add_argument("--reuse-page", action="store_true",
+                        help="Load the search page once and only change the place (see datascraper --reuse-page)")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Stand-in fixtures, e.g. a capture.py recording")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stand-in delay per response in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random stand-in delay per response")
+    parser.add_argument("--rounds", type=int, default=1, help="How often to go through the places (default: 1)")
+    parser.add_argument("--json", metavar="PATH", help="Also write the numbers to PATH")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.places, args.browser, args.fixtures, args.latency, args.jitter, args.rounds,
+                           args.profile, args.reuse_page)
+    metrics.print_latency_report()
+    datascraper.print_page_reuse_report()
+    print(f"\n{report['places']} places ({report['failed_places']} failed), {report['results']} results "
+          f"in {report['seconds']}s: {report['places_per_minute']} places/min, "
+          f"{report['results_per_second']} results/s")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(dict(report, stages=metrics.latency_summary()), f, indent=1)
@@ -0,0 +1,135 @@
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+# Tuned browser sessions for the scraper. The rijschoolzoeker only needs its HTML and its own
+# scripts: images, media, web fonts and the analytics/tracker scripts on cbr.nl are downloaded for
+# nothing on every driver.get. The tuned profile
+#   - runs truly headless (--headless=new for Chrome/Edge, -headless for Firefox) with a fixed
+#     desktop window size, so the page lays out as it does maximized,
+#   - blocks images, media, fonts and the tracker domains below (Chrome/Edge through CDP
+#     Network.setBlockedURLs, Firefox through its preferences and tracking protection),
+#   - disables extensions, and
+#   - uses the 'eager' page-load strategy: driver.get returns at DOMContentLoaded instead of
+#     waiting for every subresource; the scraper waits for the elements it needs anyway.
+#
+# What it is worth per place is measured with benchmark.py against the replay stand-in, e.g.
+#   python benchmark.py --browser edge --latency 0.2 --rounds 3 --profile plain
+#   python benchmark.py --browser edge --latency 0.2 --rounds 3 --profile tuned
+# and comparing the 'place' row of the latency tables. The stand-in serves no images or trackers,
+# so there the difference is mostly headless and eager; on cbr.nl the blocked downloads add to it.
+#
+# NOT MEASURED: the per-place time difference of the tuned profile has not been measured yet, on the
+# stand-in or on cbr.nl. It was written where no browser driver was available, so the benchmark above
+# never ran, and the gain is expected, not shown. Record the two 'place' rows here once they are run.
+BROWSERS = ("edge", "chrome", "firefox")
+WINDOW_SIZE = (1920, 1080)
+
+BLOCKED_EXTENSIONS = [
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico",
+    "woff", "woff2", "ttf", "otf", "eot",
+    "mp4", "webm", "mp3", "ogg", "wav",
+]
+TRACKER_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "facebook.net", "connect.facebook.net", "hotjar.com", "siteimproveanalytics.com",
+    "siteimprove.com", "piwik.pro", "matomo.cloud", "cookiebot.com", "consensu.org",
+    "youtube.com", "ytimg.com", "vimeo.com", "linkedin.com", "licdn.com",
+]
+
+
+def blocked_url_patterns():
+    """URL patterns for CDP Network.setBlockedURLs: the blocked file types and every tracker domain."""
+    patterns = [f"*.{extension}" for extension in BLOCKED_EXTENSIONS]
+    patterns += [f"*.{extension}?*" for extension in BLOCKED_EXTENSIONS]
+    patterns += [f"*://{domain}/*" for domain in TRACKER_DOMAINS]
+    patterns += [f"*://*.{domain}/*" for domain in TRACKER_DOMAINS]
+    return patterns
+
+
+def _chromium_options(options, headless, block_resources):
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={WINDOW_SIZE[0]},{WINDOW_SIZE[1]}")
+    else:
+        options.add_argument("--start-maximized")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--disable-component-update")
+    options.add_argument("--no-first-run")
+    if block_resources:
+        # Images are also switched off in the content settings, in case CDP blocking isn't available
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    options.page_load_strategy = "eager"
+    return options
+
+
+def _firefox_options(headless, block_resources):
+    options = webdriver.FirefoxOptions()
+    if headless:
+        options.add_argument("-headless")
+        options.add_argument(f"--width={WINDOW_SIZE[0]}")
+        options.add_argument(f"--height={WINDOW_SIZE[1]}")
+    options.set_preference("extensions.enabledScopes", 0)
+    options.set_preference("extensions.autoDisableScopes", 15)
+    if block_resources:
+        options.set_preference("permissions.default.image", 2)
+        options.set_preference("media.autoplay.default", 5)
+        options.set_preference("media.play-stand-alone", False)
+        options.set_preference("gfx.downloadable_fonts.enabled", False)
+        options.set_preference("browser.display.use_document_fonts", 0)
+        options.set_preference("privacy.trackingprotection.enabled", True)
+        options.set_preference("privacy.trackingprotection.socialtracking.enabled", True)
+    options.page_load_strategy = "eager"
+    return options
+
+
+def block_requests(driver):
+    """Block the resource types and tracker domains in a Chrome/Edge session through CDP. Returns whether it worked."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_url_patterns()})
+        return True
+    except (AttributeError, WebDriverException) as e:
+        print(f"⚠️ Could not block requests through CDP: {str(e)}")
+        return False
+
+
+def create_driver(browser="edge", headless=True, block_resources=True):
+    """Start a tuned Edge, Chrome or Firefox session (see the top of this file)."""
+    if browser == "firefox":
+        return webdriver.Firefox(options=_firefox_options(headless, block_resources))
+    if browser == "chrome":
+        driver = webdriver.Chrome(options=_chromium_options(webdriver.ChromeOptions(), headless, block_resources))
+    else:
+        driver = webdriver.Edge(options=_chromium_options(webdriver.EdgeOptions(), headless, block_resources))
+    if block_resources:
+        block_requests(driver)
+    return driver
+
+
+def create_capture_driver(browser="edge", headless=True):
+    """A tuned Chrome/Edge session that also keeps Chrome's performance log, the CDP Network.* events
+    of everything the page loads (see capture.py). Firefox has no performance log."""
+    if browser == "firefox":
+        raise ValueError("Capturing network traffic needs Chrome or Edge")
+    options = webdriver.ChromeOptions() if browser == "chrome" else webdriver.EdgeOptions()
+    options = _chromium_options(options, headless, block_resources=True)
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    driver = webdriver.Chrome(options=options) if browser == "chrome" else webdriver.Edge(options=options)
+    block_requests(driver)
+    return driver
+
+
+def create_plain_driver(browser="edge", headless=True):
+    """An untuned session (every resource, 'normal' page loads), the baseline for benchmark.py."""
+    if browser == "firefox":
+        options = webdriver.FirefoxOptions()
+        if headless:
+            options.add_argument("-headless")
+        return webdriver.Firefox(options=options)
+    options = webdriver.ChromeOptions() if browser == "chrome" else webdriver.EdgeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={WINDOW_SIZE[0]},{WINDOW_SIZE[1]}")
+    return webdriver.Chrome(options=options) if browser == "chrome" else webdriver.Edge(options=options)
@@ -0,0 +1,157 @@
+import argparse
+import base64
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+import datascraper
+from browser_profile import create_capture_driver
+from lead_store import LeadStore
+from standin_server import DEFAULT_FIXTURES, place_slug
+
+# Capture mode for offline runs: drives the real rijschoolzoeker in a browser, exactly like the
+# scraper does (search the place, pick Auto, sort, expand every result), and records every
+# response the page itself loads from Chrome's performance log (the CDP Network.* events):
+#   network.jsonl          one line per response: method, URL, request body, status, resource
+#                          type, MIME type, headers and the body file (the last response per URL wins
+#                          when the stand-in replays it)
+#   bodies/<hash>          the response bodies, stored once per content
+#   pages/<plaats>.html    the page as it looked after all results of a place were expanded
+#   captured_page.html     the rijschoolzoeker page as cbr.nl served it
+#   rijscholen_leads.csv   the leads the scraper extracted during the capture, to check a replay against
+# standin_server.py --fixtures <dir> serves the recorded responses for the URLs they were recorded
+# at. The page it serves stays the bundled rijschoolzoeker.html, which calls the http engine's
+# endpoints, until the recorded XHRs show what the live page really calls.
+RIJSCHOOLZOEKER_URL = "https://www.cbr.nl/nl/rijschoolzoeker"
+# Resource types worth replaying; images, fonts and trackers are blocked by the capture profile anyway
+RECORDED_TYPES = ("Document", "XHR", "Fetch", "Script", "Stylesheet")
+
+
+def network_events(driver):
+    """The CDP Network.* events in the browser's performance log since the last call."""
+    events = []
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        if message.get("method", "").startswith("Network."):
+            events.append(message)
+    return events
+
+
+class NetworkRecorder:
+    """Turns performance log events into recorded responses, with their bodies taken from the browser."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.requests = {}
+        self.responses = {}
+        self.counts = {"responses": 0, "bytes": 0, "no_body": 0}
+        os.makedirs(os.path.join(output_dir, "bodies"), exist_ok=True)
+        self.log = open(os.path.join(output_dir, "network.jsonl"), "a", encoding="utf-8")
+
+    def _save_body(self, body):
+        body_hash = hashlib.blake2b(body, digest_size=20).hexdigest()
+        path = os.path.join(self.output_dir, "bodies", body_hash)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(body)
+        return body_hash
+
+    def collect(self, driver, place=None):
+        """Record the responses that finished loading since the last call. Returns how many were recorded."""
+        recorded = 0
+        for event in network_events(driver):
+            params = event["params"]
+            request_id = params.get("requestId")
+            if event["method"] == "Network.requestWillBeSent":
+                self.requests[request_id] = params["request"]
+            elif event["method"] == "Network.responseReceived" and params.get("type") in RECORDED_TYPES:
+                self.responses[request_id] = params
+            elif event["method"] == "Network.loadingFinished" and request_id in self.responses:
+                recorded += self._record(driver, request_id, place)
+        return recorded
+
+    def _record(self, driver, request_id, place):
+        received = self.responses.pop(request_id)
+        request = self.requests.pop(request_id, {})
+        response = received["response"]
+        try:
+            result = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        except WebDriverException:
+            # Redirects and bodies the browser already let go of
+            self.counts["no_body"] += 1
+            return 0
+        body = base64.b64decode(result["body"]) if result.get("base64Encoded") else result["body"].encode("utf-8")
+        self.log.write(json.dumps({
+            "place": place,
+            "method": request.get("method", "GET"),
+            "url": response["url"],
+            "post_data": request.get("postData"),
+            "status": response["status"],
+            "type": received["type"],
+            "mime_type": response.get("mimeType"),
+            "headers": response.get("headers", {}),
+            "body": self._save_body(body),
+            "recorded_at": time.time(),
+        }, ensure_ascii=False) + "\n")
+        self.log.flush()
+        self.counts["responses"] += 1
+        self.counts["bytes"] += len(body)
+        return 1
+
+    def close(self):
+        self.log.close()
+
+
+def capture_places(places, rijschoolzoeker_url, output_dir, browser="edge", headless=True):
+    """Scrape places in a browser and record everything the page loads into output_dir. Returns the counts."""
+    os.makedirs(os.path.join(output_dir, "pages"), exist_ok=True)
+    page_path = os.path.join(output_dir, "rijschoolzoeker.html")
+    if not os.path.exists(page_path):
+        shutil.copy(os.path.join(DEFAULT_FIXTURES, "rijschoolzoeker.html"), page_path)
+
+    datascraper.RIJSCHOOLZOEKER_URL = rijschoolzoeker_url
+    datascraper.lead_store = LeadStore(output_dir)
+    driver = create_capture_driver(browser, headless)
+    driver.execute_cdp_cmd("Network.enable", {"maxTotalBufferSize": 100_000_000, "maxResourceBufferSize": 20_000_000})
+    recorder = NetworkRecorder(output_dir)
+    counts = {"places": 0, "errors": 0}
+    try:
+        driver.get(rijschoolzoeker_url)
+        with open(os.path.join(output_dir, "captured_page.html"), "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+        recorder.collect(driver)
+
+        for place in places:
+            if datascraper.process_place(driver, place):
+                counts["places"] += 1
+            else:
+                counts["errors"] += 1
+            with open(os.path.join(output_dir, "pages", place_slug(place) + ".html"), "w", encoding="utf-8") as f:
+                f.write(driver.page_source)
+            print(f"✓ Captured {place}: {recorder.collect(driver, place)} responses")
+    finally:
+        driver.quit()
+        recorder.close()
+        datascraper.lead_store.close()
+    return dict(counts, **recorder.counts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Record what the rijschoolzoeker loads while scraping a set of places, for standin_server.py.")
+    parser.add_argument("places", nargs="+", help="Place names to capture")
+    parser.add_argument("--url", default=RIJSCHOOLZOEKER_URL, help=f"Rijschoolzoeker URL (default: {RIJSCHOOLZOEKER_URL})")
+    parser.add_argument("--output", default=os.path.join("fixtures", "captured"),
+                        help="Directory to write the recordings to (default: fixtures/captured)")
+    parser.add_argument("--browser", choices=["edge", "chrome"], default="edge", help="Browser to record with (default: edge)")
+    parser.add_argument("--headed", action="store_true", help="Show the browser window")
+    args = parser.parse_args()
+
+    counts = capture_places(args.places, args.url, args.output, args.browser, not args.headed)
+    print(f"Captured {counts['places']} places ({counts['errors']} failed): {counts['responses']} responses, "
+          f"{counts['bytes']} bytes, {counts['no_body']} without a body, into {args.output}")
+    print(f"Replay with: python standin_server.py --fixtures {args.output}")
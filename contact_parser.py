@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# Contact details from free text in a single pass. One precompiled regex with a named group per
+# kind (email, url, phone) is run over the text once; the alternatives are tried left to right at
+# each position, so an email address is never also read as a website and the digits in a URL are
+# never read as a phone number.
+#
+# Phone numbers are Dutch numbers and come out in E.164 (+31 and the 9 digits after the leading 0).
+# Candidates that don't have exactly 10 national digits are dropped. A number has to start at a word
+# boundary, and IBANs (NL91ABNA0417164300, NL91 ABNA 0417 1643 00) are matched as a kind of their own
+# and ignored, so their account number is never read as a phone number. Digit groups may be separated
+# by a space, or a dot or dash with spaces around it ("072 - 562 33 24").
+PHONE_SEPARATOR = r"(?:[^\S\n]?[.-][^\S\n]?|\s)?"
+CONTACT_PATTERN = re.compile(
+    r"(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,})"
+    r"|(?P<url>(?:https?://|www\.)[^\s<>\"'()]+"
+    r"|\b[A-Za-z0-9][A-Za-z0-9-]*(?:\.[A-Za-z0-9-]+)*\.(?:nl|com|net|org|eu|be|info|de)\b(?:/[^\s<>\"'()]*)?)"
+    r"|(?P<iban>\b[A-Za-z]{2}\d{2}[^\S\n]?[A-Za-z]{4}(?:[^\S\n]?\d){6,20})"
+    r"|(?P<phone>(?<![\w+])(?:(?:\+|00)31" + PHONE_SEPARATOR + r"(?:\(0\)" + PHONE_SEPARATOR + r")?|\(?0)\d{1,3}\)?"
+    r"(?:" + PHONE_SEPARATOR + r"\d){6,8}(?!\d))"
+)
+URL_TRAILING = ".,;:!?"
+DEFAULT_CORPUS = os.path.join("fixtures", "contacts", "corpus.jsonl")
+# Whole pages for the benchmark: a result list as the scraper sees it and a school's website
+DEFAULT_PAGES = [os.path.join("fixtures", "pages", "results_alkmaar.html"),
+                 os.path.join("fixtures", "regression", "rijbewijstips_page_40117.html")]
+
+
+@dataclass
+class Contacts:
+    """The contact details found in a text, each list in order of appearance without duplicates."""
+    emails: List[str] = field(default_factory=list)
+    phones: List[str] = field(default_factory=list)
+    urls: List[str] = field(default_factory=list)
+
+
+def phone_to_e164(text) -> Optional[str]:
+    """A Dutch phone number as +31XXXXXXXXX, or None if text isn't a complete Dutch number."""
+    digits = re.sub(r"\D", "", text or "")
+    if digits.startswith("0031"):
+        digits = digits[4:]
+    elif digits.startswith("31") and (text or "").lstrip().startswith("+"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = digits[1:]
+    else:
+        return None
+    if digits.startswith("0"):
+        # The "(0)" in +31 (0)72 ...
+        digits = digits[1:]
+    if len(digits) != 9 or digits[0] == "0":
+        return None
+    return "+31" + digits
+
+
+def parse_contacts(text) -> Contacts:
+    """Find all email addresses, Dutch phone numbers (E.164) and website URLs in text."""
+    contacts = Contacts()
+    for match in CONTACT_PATTERN.finditer(text or ""):
+        kind = match.lastgroup
+        if kind == "iban":
+            continue
+        if kind == "email":
+            value = match.group().lower()
+            values = contacts.emails
+        elif kind == "url":
+            value = match.group().rstrip(URL_TRAILING)
+            if not value.lower().startswith(("http://", "https://")):
+                value = "http://" + value
+            values = contacts.urls
+        else:
+            value = phone_to_e164(match.group())
+            values = contacts.phones
+        if value and value not in values:
+            values.append(value)
+    return contacts
+
+
+def clean_phone(text) -> Optional[str]:
+    """The first Dutch phone number in text (e.g. a tel: link) in E.164, or the text itself if there is none.
+    Meant for a field that holds a phone number, so a name glued to the front ("ferry0653412544") is skipped."""
+    text = (text or "").strip()
+    if text.lower().startswith("tel:"):
+        text = text[4:]
+    phones = parse_contacts(text).phones or parse_contacts(re.sub(r"^[^\W\d_]+(?=[0+(])", "", text)).phones
+    return phones[0] if phones else (text or None)
+
+
+def read_corpus(path=DEFAULT_CORPUS):
+    """Yield the test cases of a corpus file: one JSON object per line with the text and the expected contacts."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def check_corpus(path=DEFAULT_CORPUS):
+    """Parse every corpus text and compare with the expected contacts (and clean_phone's result, for cases
+    that give one). Returns the failing cases."""
+    failures = []
+    for case in read_corpus(path):
+        contacts = parse_contacts(case["text"])
+        for kind in ("emails", "phones", "urls"):
+            if kind in case and getattr(contacts, kind) != case[kind]:
+                failures.append((case["text"], kind, case[kind], getattr(contacts, kind)))
+        if "clean_phone" in case and clean_phone(case["text"]) != case["clean_phone"]:
+            failures.append((case["text"], "clean_phone", case["clean_phone"], clean_phone(case["text"])))
+    return failures
+
+
+# The regexes extract_phone_number and extract_website used to run over the page text, one
+# findall per pattern; kept here as the baseline for the benchmark
+_OLD_FALLBACK_PATTERNS = [
+    r'\b0[1-9][0-9]{7,8}\b', r'\b06[0-9]{8}\b', r'\b\+31[0-9]{9}\b', r'\b0031[0-9]{9}\b',
+    r'https?://[^\s<>"]+', r'www\.[^\s<>"]+', r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
+]
+
+
+def _old_fallbacks(text):
+    return [re.findall(pattern, text.replace(' ', '') if i < 4 else text)
+            for i, pattern in enumerate(_OLD_FALLBACK_PATTERNS)]
+
+
+def benchmark(texts, repeat=200, label="texts"):
+    """Time parse_contacts against the old per-pattern fallbacks over the given texts."""
+    size = sum(len(text) for text in texts)
+    print(f"{len(texts)} {label}, {size / len(texts):.0f} characters on average:")
+    for name, function in (("parse_contacts", parse_contacts), ("old fallbacks", _old_fallbacks)):
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            for text in texts:
+                function(text)
+        elapsed = time.perf_counter() - start_time
+        print(f"{name:>15}: {elapsed / (repeat * len(texts)) * 1e6:.1f} µs per text, "
+              f"{size * repeat / elapsed / 1e6:.1f} MB/s ({repeat * len(texts)} texts in {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the contact parser against its corpus, or benchmark it.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help=f"Corpus file (default: {DEFAULT_CORPUS})")
+    parser.add_argument("--benchmark", action="store_true", help="Time the parser on the corpus texts and whole pages")
+    parser.add_argument("--pages", nargs="+", default=DEFAULT_PAGES,
+                        help="HTML pages to benchmark on (default: the bundled result list and website page)")
+    parser.add_argument("--repeat", type=int, default=200, help="Benchmark rounds over the corpus (default: 200)")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark([case["text"] for case in read_corpus(args.corpus)], args.repeat, "corpus snippets")
+        pages = []
+        for path in args.pages:
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append(f.read())
+        benchmark(pages, args.repeat, "full pages")
+    else:
+        failures = check_corpus(args.corpus)
+        for text, kind, expected, found in failures:
+            print(f"✗ {text!r}: expected {kind} {expected}, found {found}")
+        print(f"{'✓' if not failures else '✗'} {len(failures)} failures in {args.corpus}")
+        raise SystemExit(1 if failures else 0)
@@ -1,162 +1,305 @@
-from selenium import webdriver
-from selenium.webdriver.edge.options import Options
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.remote.webelement import WebElement
 import time
 import re
 import json
 import os
-import csv
-
-# Global variable to store the fastest selector for Auto button
-fastest_auto_selector = None
-found_schoolnames = set()
-found_emails = set()
-found_websites = set()
-found_phone_numbers = set()
-entries = set()
-
-def load_dutch_places():
-    """Load Dutch place names from the JSON file."""
+import argparse
+import queue
+import threading
+from contextlib import nullcontext
+from urllib.parse import urlparse
+from result_parser import Record, parse_result_html, is_chrome_link, WEBSITE_EXCLUDES
+from contact_parser import clean_phone, parse_contacts
+import metrics
+from metrics import count, observe, print_latency_report, profiled, span
+from progress_journal import ProgressJournal, COMPLETED, FAILED, SKIPPED, NO_RESULTS, STOPPED_EARLY
+from rid_index import RidIndex
+from refresh_index import RefreshIndex
+from selector_registry import SelectorRegistry
+from lead_store import Lead, LeadStore
+from dedup_store import DEFAULT_EXPECTED_KEYS, DedupStore, lead_entry
+from pipeline import ScrapePipeline
+from yield_model import YieldModel
+import browser_profile
+from driver_manager import DEFAULT_RECYCLE_AFTER, DriverManager, close_stray_tabs
+
+RIJSCHOOLZOEKER_URL = "https://www.cbr.nl/nl/rijschoolzoeker"
+
+# Maximum number of seconds each condition-based wait may take, override with --wait stage=seconds
+WAIT_TIMEOUTS = {
+    "search_input": 10,   # search input present after loading the page
+    "autocomplete": 3,    # autocomplete suggestions shown after typing the place
+    "auto_button": 5,     # 'Auto' vehicle button clickable after pressing Enter
+    "results": 10,        # number of result rows stable
+    "sort": 5,            # old result rows replaced after choosing the sort order
+    "details": 3,         # detail panel of a clicked result expanded
+    "place_switch": 5,    # old result rows replaced after searching the next place in a reused page
+}
+SEARCH_INPUT_SELECTOR = 'input[aria-label="Zoek een plaatsnaam"]'
+AUTOCOMPLETE_SELECTOR = "[class*='autocomplete'] li, [role='listbox'] [role='option']"
+RESULT_ROW_SELECTOR = "[data-rid]"
+# The results title when a search found no driving schools at all
+NO_RESULTS_XPATH = "//*[contains(normalize-space(text()), 'Geen resultaten')]"
+# Blanks that title's text, so a search in a loaded page can't be mistaken for the last one
+CLEAR_NO_RESULTS_SCRIPT = """
+var found = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+for (var i = 0; i < found.snapshotLength; i++) {
+    found.snapshotItem(i).childNodes.forEach(function (node) {
+        if (node.nodeType === Node.TEXT_NODE && node.nodeValue.indexOf('Geen resultaten') >= 0) {
+            node.nodeValue = '';
+        }
+    });
+}
+"""
+DETAILS_SELECTOR = "a[href^='mailto:'], a[href^='tel:'], [class*='details'] a, [class*='details'] address"
+
+# Candidate selectors per stage, ranked by how fast and reliably they worked (see selector_registry.py)
+selector_registry = SelectorRegistry()
+# Saved entries, shared by all worker threads (see dedup_store.py). Created by main(), or on first use by
+# modules that drive process_place themselves (seen_store)
+seen = None
+_seen_lock = threading.Lock()
+
+# Progress journal of the current run (see progress_journal.py), None when journaling is off
+journal = None
+# data-rids scraped in this or earlier runs (see rid_index.py), None to scrape every result
+seen_rids = None
+
+# Where the leads are written (see lead_store.py)
+lead_store = None
+# Parser/writer stages that take extraction and saving off the browser threads (see pipeline.py), or None
+pipeline = None
+# Per-place results/new leads statistics used to order places and stop early (see yield_model.py)
+yield_model = None
+# Row hashes of the previous run for --refresh (see refresh_index.py), None to extract every result
+refresh_index = None
+# On-disk response cache of the http engine (see http_cache.py), None when it's off or the engine is selenium
+http_cache = None
+# Place to run under cProfile (--profile-place) and the file the profile is saved to, None to profile nothing
+profile_place = None
+profile_file = None
+# Browser of the worker sessions and whether they run headless and block images/fonts/trackers (see browser_profile.py)
+browser = "edge"
+headless = True
+block_resources = True
+# Leases, health checks, recycling and warm spares of the browser sessions (see driver_manager.py)
+driver_manager = None
+recycle_after = DEFAULT_RECYCLE_AFTER
+max_browser_mb = None
+spare_drivers = 1
+# With --reuse-page every worker loads the rijschoolzoeker once and then only types the next place into
+# the search box: the 'Auto' vehicle and the alphabetical sort stay selected, so just the result list is
+# fetched again. Session ids of the drivers whose page has the vehicle and sort set up:
+reuse_page = False
+prepared_pages = set()
+# Set on Ctrl-C: workers finish the result they're on and stop, so everything in flight can be saved
+stop_requested = threading.Event()
+
+def load_dutch_places(file_name="examen_plaatsen.json"):
+    """Load Dutch place names from a JSON file with a "plaatsnamen" list."""
+    json_path = file_name
+    if not os.path.isabs(json_path) and not os.path.exists(json_path):
+        json_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), file_name)
     try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        json_path = os.path.join(script_dir, "examen_plaatsen.json")
         with open(json_path, "r", encoding="utf-8") as f:
             data = json.load(f)
             return data.get("plaatsnamen", [])
     except FileNotFoundError:
-        print("Error: examen_plaatsen.json not found!")
+        print(f"Error: {file_name} not found!")
         return []
     except json.JSONDecodeError:
-        print("Error: Invalid JSON format in examen_plaatsen.json!")
+        print(f"Error: Invalid JSON format in {file_name}!")
         return []
 
 
+def site_host():
+    """Host of the rijschoolzoeker site we're scraping, used to recognise stray tabs."""
+    return urlparse(RIJSCHOOLZOEKER_URL).netloc.lower()
+
+
+def wait_for(driver, stage, condition):
+    """Wait until condition(driver) is truthy for at most WAIT_TIMEOUTS[stage] seconds.
+    Returns the condition's value, or None on timeout. The time spent is recorded per stage."""
+    start_time = time.time()
+    try:
+        return WebDriverWait(driver, WAIT_TIMEOUTS[stage], poll_frequency=0.05).until(condition)
+    except TimeoutException:
+        print(f"  ⏰ Timeout na {WAIT_TIMEOUTS[stage]}s bij wachten op {stage}")
+        return None
+    finally:
+        observe(stage, time.time() - start_time)
+
+
+def record_result(place_name, rid, status):
+    """Write the status of a search result to the progress journal, if there is one."""
+    if status == FAILED:
+        count("result_failures")
+    if journal:
+        journal.record_result(place_name, rid, status)
+
+
+def result_saved(place_name, rid, ok):
+    """Record that a result's lead was saved (ok) or that extracting it failed.
+    The rid is known right away, so the next places skip it; it is only journaled as done and written to
+    the seen rids once its lead is on disk, so a killed run can't skip a lost lead on --resume."""
+    if not ok:
+        record_result(place_name, rid, FAILED)
+        return
+    if seen_rids is not None:
+        seen_rids.claim(rid)
+
+    def written():
+        record_result(place_name, rid, COMPLETED)
+        if seen_rids is not None:
+            seen_rids.write(rid)
+        if refresh_index is not None:
+            refresh_index.confirm(place_name, rid)
+
+    lead_store.when_written(written)
+
+
+class result_rows_stable:
+    """Wait condition: there are result rows and their number hasn't changed for `settle` seconds,
+    or the page has said there are no results for that long."""
+
+    def __init__(self, settle=0.3):
+        self.settle = settle
+        self.count = None
+        self.since = time.time()
+
+    def __call__(self, driver):
+        count = len(driver.find_elements(By.CSS_SELECTOR, RESULT_ROW_SELECTOR))
+        now = time.time()
+        if count != self.count:
+            self.count = count
+            self.since = now
+            return False
+        if now - self.since < self.settle:
+            return False
+        return count > 0 or shows_no_results(driver)
+
+
+def shows_no_results(driver):
+    """Whether the page says the search found no driving schools."""
+    try:
+        return any(element.is_displayed() for element in driver.find_elements(By.XPATH, NO_RESULTS_XPATH))
+    except WebDriverException:
+        return False
+
+
+def page_is_usable(driver):
+    """Whether a loaded page can take the next place: still on the rijschoolzoeker, with its search box."""
+    try:
+        if site_host() not in driver.current_url.lower():
+            return False
+        return bool(driver.find_elements(By.CSS_SELECTOR, SEARCH_INPUT_SELECTOR))
+    except WebDriverException:
+        return False
+
+
+def search_in_loaded_page(driver, place_name):
+    """Search the next place in a page that already has the vehicle and sort set up.
+    Returns True when the new result list is there, False when the page has to be reloaded."""
+    try:
+        old_rows = driver.find_elements(By.CSS_SELECTOR, RESULT_ROW_SELECTOR)
+        if not old_rows:
+            # Nothing to go stale after a place without results: only the new search may show its title again
+            driver.execute_script(CLEAR_NO_RESULTS_SCRIPT, NO_RESULTS_XPATH)
+        search_box = driver.find_element(By.CSS_SELECTOR, SEARCH_INPUT_SELECTOR)
+        with span("search"):
+            search_box.clear()
+            search_box.send_keys(place_name)
+            print(f"Typed '{place_name}' into search field of the loaded page")
+            wait_for(driver, "autocomplete", EC.visibility_of_element_located((By.CSS_SELECTOR, AUTOCOMPLETE_SELECTOR)))
+            search_box.send_keys(Keys.ENTER)
+        # The page only fetches the results again, still for 'Auto' and sorted alphabetically
+        if old_rows and wait_for(driver, "place_switch", EC.staleness_of(old_rows[0])) is None:
+            return False
+        return wait_for(driver, "results", result_rows_stable()) is not None
+    except WebDriverException as e:
+        print(f"  ✗ Searching {place_name} in the loaded page failed: {str(e)}")
+        return False
+
+
 def process_place(driver, place_name):
-    """Process a single place name by searching for 'gym + place_name'."""
+    """Process a single place name by searching for 'gym + place_name'.
+    Returns True when the place's result list was processed, NO_RESULTS when the place has no driving
+    schools, False when the place failed."""
     print(f"Processing place: {place_name}")
-    driver.get("https://www.cbr.nl/nl/rijschoolzoeker")
+    place_start_time = time.time()
+    if reuse_page and driver.session_id in prepared_pages:
+        if page_is_usable(driver) and search_in_loaded_page(driver, place_name):
+            observe("setup_reused", time.time() - place_start_time)
+            count("page_reuses")
+            return click_all_search_results(driver, place_name)
+        print(f"  🔄 The loaded page is not usable for {place_name}, reloading it")
+        prepared_pages.discard(driver.session_id)
+        count("page_reload_fallbacks")
+        place_start_time = time.time()
 
-    time.sleep(2)
-    
-    # Wait for page to load
-    wait = WebDriverWait(driver, 10)
+    place_done = False
+    driver.get(RIJSCHOOLZOEKER_URL)
+    observe("page_load", time.time() - place_start_time)
     
     try:
         # Try multiple selectors to find the search input field
         search_box = None
         
         # First try by aria-label (most specific)
-        try:
-            search_box = wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'input[aria-label="Zoek een plaatsnaam"]'))
-            )
-        except:
-            pass
+        search_box = wait_for(driver, "search_input",
+                              EC.presence_of_element_located((By.CSS_SELECTOR, SEARCH_INPUT_SELECTOR)))
 
         
         if search_box:
-            # Clear the input field first
-            search_box.clear()
-            
-            # Type the place name
-            search_box.send_keys(place_name)
-            print(f"Typed '{place_name}' into search field")
-            
-            # Wait a moment for any autocomplete suggestions
-            time.sleep(2.5)
-            
-            # Press Enter to search
-            search_box.send_keys(Keys.ENTER)
+            with span("search"):
+                # Clear the input field first
+                search_box.clear()
+                
+                # Type the place name
+                search_box.send_keys(place_name)
+                print(f"Typed '{place_name}' into search field")
+                
+                # Wait for the autocomplete suggestions
+                wait_for(driver, "autocomplete", EC.visibility_of_element_located((By.CSS_SELECTOR, AUTOCOMPLETE_SELECTOR)))
+                
+                # Press Enter to search, the vehicle buttons show up when the search is done
+                search_box.send_keys(Keys.ENTER)
             # print(f"Pressed Enter to search for '{place_name}'")
             
-            # Wait for search results to load
-            time.sleep(2.5)
-            
             # Now click on the "Auto" button to select car as vehicle type
             try:
-                global fastest_auto_selector
-                auto_button = None
                 start_time = time.time()
+                # Only a visible 'Auto' element counts (hidden elements have no text), so this waits for the button
+                auto_buttons = selector_registry.locate(driver, "auto_button", WAIT_TIMEOUTS["auto_button"])
                 
-                # Define all possible selectors (ordered by likely speed)
-                all_selectors = [
-                    # The selector that actually worked in testing
-                    "//a[contains(@class, 'vehicle')]//span[text()='Auto']",
-                    # Alternative XPath selectors
-                    # "//span[text()='Auto']",
-                    # "//span[contains(text(), 'Auto')]",
-                    # CSS selectors (might not work on this site)
-                    # "ul.vehicles li.vehicle_wrapper a.vehicle span.vehicle_name",
-                    # "span.vehicle_name",
-                    # ".vehicle_name"
-                ]
-                
-                # If we have a known fastest selector, try it first
-                if fastest_auto_selector:
-                    selectors = [fastest_auto_selector] + [s for s in all_selectors if s != fastest_auto_selector]
-                    # print(f"  Using cached fastest selector first: {fastest_auto_selector}")
-                else:
-                    selectors = all_selectors
-                    # print(f"  No cached selector, trying all {len(selectors)} selectors")
-                
-                for i, selector in enumerate(selectors):
-                    selector_start_time = time.time()
-                    # print(f"  Trying selector {i+1}/{len(selectors)}: {selector}")
-                    
-                    try:
-                        # Use shorter timeout for faster selector testing
-                        short_wait = WebDriverWait(driver, 2)  # 2 seconds instead of 10
-                        
-                        if selector.startswith("//"):
-                            # XPath selector
-                            auto_button = short_wait.until(
-                                EC.element_to_be_clickable((By.XPATH, selector))
-                            )
-                        else:
-                            # CSS selector
-                            auto_button = short_wait.until(
-                                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                            )
-                        
-                        if auto_button:
-                            selector_time = time.time() - selector_start_time
-                            total_time = time.time() - start_time
-                            print(f"  ✓ Found 'Auto' button using selector: {selector}")
-                            # print(f"  ✓ Selector took {selector_time:.2f}s, total time: {total_time:.2f}s")
-                            
-                            # Cache the fastest selector for future use
-                            if not fastest_auto_selector or selector_time < 1.0:  # If it's fast, cache it
-                                fastest_auto_selector = selector
-                                # print(f"  💾 Cached this selector as fastest: {selector}")
-                            
-                            break
-                        else:
-                            selector_time = time.time() - selector_start_time
-                            print(f"  ✗ Selector failed after {selector_time:.2f}s")
-                    except Exception as e:
-                        selector_time = time.time() - selector_start_time
-                        print(f"  ✗ Selector failed after {selector_time:.2f}s: {str(e)}")
-                        continue
-                
-                if auto_button:
+                if auto_buttons:
+                    observe("auto_button", time.time() - start_time)
+                    auto_button = auto_buttons[0]
                     # Click on the parent <a> tag if we found the span
                     if auto_button.tag_name == 'span':
                         auto_button = auto_button.find_element(By.XPATH, "./parent::a")
                     
-                    auto_button.click()
+                    with span("auto_click"):
+                        auto_button.click()
                     print(f"Clicked on 'Auto' button for {place_name}")
                     
                     # Wait for the results to load after selecting vehicle type
-                    time.sleep(1)
+                    wait_for(driver, "results", result_rows_stable())
                     
                     # Now try to find and select the sorting dropdown
-                    select_sorting_option(driver, place_name)
+                    with span("sort"):
+                        sorted_ok = select_sorting_option(driver, place_name)
+                    observe("setup_full", time.time() - place_start_time)
+                    if reuse_page and sorted_ok:
+                        prepared_pages.add(driver.session_id)
                     
                     # Now click on ALL search results one by one
-                    click_all_search_results(driver, place_name)
+                    place_done = click_all_search_results(driver, place_name)
                 else:
                     print(f"Could not find 'Auto' button for {place_name} with any selector")
                 
@@ -168,116 +311,28 @@ def process_place(driver, place_name):
             
     except Exception as e:
         print(f"Error processing place '{place_name}': {str(e)}")
+    return place_done
 
 
 def select_sorting_option(driver, place_name):
-    """Find and select the 'Alfabetisch A-Z' sorting option from the dropdown."""
+    """Find and select the 'Alfabetisch A-Z' sorting option from the dropdown. Returns True when it was selected."""
     # print(f"  🔍 Looking for sorting dropdown for {place_name}")
     
     try:
-        wait = WebDriverWait(driver, 5)
-        start_time = time.time()
-        
-        # Try multiple selectors to find the sorting dropdown
-        dropdown_selectors = [
-            # Common dropdown selectors
-            # "select",
-            "[class*='sort']",
-            # "[class*='dropdown']",
-            # "[class*='filter']",
-            # "[class*='sorteren']",
-            # More specific selectors
-            # "button[aria-haspopup='true']",
-            # "button[aria-expanded]",
-            # ".sort-button",
-            # ".dropdown-button",
-            # ".filter-button"
-        ]
-        
-        dropdown_element = None
-        for i, selector in enumerate(dropdown_selectors):
-            selector_start_time = time.time()
-            # print(f"    Trying dropdown selector {i+1}/{len(dropdown_selectors)}: {selector}")
+        # The sort options only exist once the sorting dropdown is there
+        if selector_registry.locate(driver, "sort_dropdown"):
+            # print(f"  ✓ Found sorting dropdown, looking for the 'Alfabetisch A-Z' option")
+            sort_options = selector_registry.locate(driver, "sort_option")
             
-            try:
-                if selector.startswith("//"):
-                    # XPath selector
-                    elements = driver.find_elements(By.XPATH, selector)
-                else:
-                    # CSS selector
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                
-                if elements:
-                    # print(f"    ✓ Found {len(elements)} potential dropdown elements with selector: {selector}")
-                    
-                    # Check each element to see if it's the sorting dropdown
-                    for j, element in enumerate(elements):
-                        try:
-                            element_text = element.text.strip()
-                            element_html = element.get_attribute('outerHTML')
-                            # print(f"      Element {j+1}: Text='{element_text[:50]}...' HTML='{element_html[:100]}...'")
-                            
-                            # Look for sorting-related text
-                            if any(keyword in element_text.lower() for keyword in ['sorteren', 'sort', 'filter', 'dropdown']):
-                                dropdown_element = element
-                                # print(f"      ✓ Found sorting dropdown: {element_text}")
-                                break
-                        except Exception as e:
-                            # print(f"      ✗ Error checking element {j+1}: {str(e)}")
-                            continue
-                    
-                    if dropdown_element:
-                        break
-                else:
-                    selector_time = time.time() - selector_start_time
-                    # print(f"    ✗ No elements found with selector: {selector} (took {selector_time:.2f}s)")
-                    
-            except Exception as e:
-                selector_time = time.time() - selector_start_time
-                print(f"    ✗ Selector failed after {selector_time:.2f}s: {str(e)}")
-                continue
-        
-        if dropdown_element:
-            # print(f"  ✓ Found sorting dropdown, attempting to click it")
-            
-            # Click the dropdown to open it
-            # dropdown_element.click()
-            # print(f"  ✓ Clicked dropdown, waiting for options to appear")
-            time.sleep(0.01)
-            
-            # Now look for the "Alfabetisch A-Z" option
-            sort_option_selectors = [
-                "//*[contains(text(), 'Alfabetisch A - Z')]",
-                # "//*[contains(text(), 'Alfabetisch A-Z')]",
-                # "//*[contains(text(), 'Alfabetisch')]",
-                # "//option[contains(text(), 'Alfabetisch')]",
-                # "//li[contains(text(), 'Alfabetisch')]",
-                # "//div[contains(text(), 'Alfabetisch')]"
-            ]
-            
-            sort_option = None
-            for i, selector in enumerate(sort_option_selectors):
-                try:
-                    elements = driver.find_elements(By.XPATH, selector)
-                    if elements:
-                        # print(f"    ✓ Found {len(elements)} potential 'Alfabetisch A-Z' options with selector: {selector}")
-                        for j, element in enumerate(elements):
-                            element_text = element.text.strip()
-                            # print(f"      Option {j+1}: '{element_text}'")
-                            if 'alfabetisch' in element_text.lower() and 'a' in element_text.lower():
-                                sort_option = element
-                                # print(f"      ✓ Found 'Alfabetisch A-Z' option: '{element_text}'")
-                                break
-                        if sort_option:
-                            break
-                except Exception as e:
-                    # print(f"    ✗ Error with sort option selector {selector}: {str(e)}")
-                    continue
-            
-            if sort_option:
-                sort_option.click()
+            if sort_options:
+                old_rows = driver.find_elements(By.CSS_SELECTOR, RESULT_ROW_SELECTOR)
+                sort_options[0].click()
                 print(f"  ✓ Successfully selected 'Alfabetisch A-Z' sorting option")
-                time.sleep(1)  # Wait for sorting to apply
+                # Wait for sorting to apply: the old rows are replaced and the new list has settled
+                if old_rows:
+                    wait_for(driver, "sort", EC.staleness_of(old_rows[0]))
+                wait_for(driver, "results", result_rows_stable())
+                return True
             else:
                 print(f"  ✗ Could not find 'Alfabetisch A-Z' option in dropdown")
         else:
@@ -285,90 +340,63 @@ def select_sorting_option(driver, place_name):
             
     except Exception as e:
         print(f"  ✗ Error selecting sorting option for {place_name}: {str(e)}")
+    return False
 
 
 def click_all_search_results(driver, place_name):
-    """Find and click on ALL search results in the list, one by one."""
+    """Find and click on ALL search results in the list, one by one.
+    Returns True when the result list was found and gone through, NO_RESULTS when the page says there
+    are no results, False otherwise."""
     # print(f"  🔍 Looking for ALL search results for {place_name}")
     
     try:
-        wait = WebDriverWait(driver, 5)
-        start_time = time.time()
-        
-        # Try multiple selectors to find search results
-        result_selectors = [
-            # Based on the HTML structure shown (table-row with data-rid)
-            # "div.table-row",
-            # "[data-rid]",
-            # ".table-row",
-            # Alternative selectors for search results
-            # "[class*='result']",
-            # "[class*='item']",
-            "[class*='row']",
-            # "article",
-            # ".result-item",
-            # ".search-result",
-            # ".list-item"
-        ]
+        wait_for(driver, "results", result_rows_stable())
         
-        all_results = []
-        working_selector = None
-
-        time.sleep(1)
-        
-        for i, selector in enumerate(result_selectors):
-            selector_start_time = time.time()
-            # print(f"    Trying result selector {i+1}/{len(result_selectors)}: {selector}")
-            
-            try:
-                if selector.startswith("//"):
-                    # XPath selector
-                    elements = driver.find_elements(By.XPATH, selector)
-                else:
-                    # CSS selector
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                
-                if elements:
-                    print(f"    ✓ Found {len(elements)} potential result elements with selector: {selector}")
-                    
-                    # Check each element to see if it's a search result
-                    valid_results = []
-                    for j, element in enumerate(elements):
-                        try:
-                            element_text = element.text.strip()
-                            element_rid = element.get_attribute('data-rid')
-                            
-                            # Look for elements that look like search results
-                            # Check if it has data-rid (like in the HTML structure shown)
-                            if element_rid and element_rid != 'None':
-                                valid_results.append(element)
-                                # print(f"      ✓ Valid result {len(valid_results)}: data-rid='{element_rid}', text='{element_text[:50]}...'")
-                        except Exception as e:
-                            print(f"      ✗ Error checking element {j+1}: {str(e)}")
-                            continue
-                    
-                    if valid_results:
-                        all_results = valid_results
-                        working_selector = selector
-                        print(f"    ✓ Found {len(all_results)} valid search results with selector: {selector}")
-                        break
-                else:
-                    selector_time = time.time() - selector_start_time
-                    print(f"    ✗ No elements found with selector: {selector} (took {selector_time:.2f}s)")
-                    
-            except Exception as e:
-                selector_time = time.time() - selector_start_time
-                print(f"    ✗ Selector failed after {selector_time:.2f}s: {str(e)}")
-                continue
+        # The rows with a data-rid, found with the fastest working result selector
+        all_results = selector_registry.locate(driver, "result_rows")
+        all_rids = []
+        all_texts = []
+        for element in all_results:
+            all_rids.append(element.get_attribute('data-rid'))
+            all_texts.append(element.text.strip())
         
         if all_results:
             print(f"  ✓ Found {len(all_results)} search results, clicking each one...")
+            count("results", len(all_results))
+            if yield_model:
+                yield_model.count_results(place_name, len(all_results))
             
             # Click on each result one by one (limit to first 10 for testing)
             max_results = min(1000, len(all_results))  # Limit to first 10 results for now
             # print(f"    ⚠️ Limiting to first {max_results} results for testing")
             
+            changed_rids = None
+            if refresh_index is not None:
+                # Only rows that are new or whose text changed since the last run get clicked
+                changed_rids = refresh_index.compare(place_name, dict(zip(all_rids, all_texts)))
+                print(f"  🔄 {len(changed_rids)} of {len(all_rids)} results are new or changed for {place_name}")
+
+            skipped_known = 0
             for i, result in enumerate(all_results[:max_results]):
+                if stop_requested.is_set():
+                    print(f"  ⏹️ Stopping before result {i+1} for {place_name}")
+                    return False
+
+                rid = all_rids[i]
+                if journal and journal.is_result_done(place_name, rid):
+                    print(f"      ⏭️ Result {i+1} (data-rid {rid}) already done in a previous run")
+                    continue
+                if changed_rids is not None:
+                    if rid not in changed_rids:
+                        skipped_known += 1
+                        record_result(place_name, rid, SKIPPED)
+                        continue
+                elif seen_rids is not None and rid in seen_rids:
+                    # Already scraped for another place or in an earlier run, no need to click it
+                    skipped_known += 1
+                    record_result(place_name, rid, SKIPPED)
+                    continue
+
                 try:
                     # print(f"    📍 Processing result {i+1}/{max_results}")
                     
@@ -377,28 +405,10 @@ def click_all_search_results(driver, place_name):
                     
                     # Scroll the result into view first
                     driver.execute_script("arguments[0].scrollIntoView(true);", result)
-                    time.sleep(0.01)  # Wait for scroll to complete
                     
                     # Try to find a clickable element within the result
-                    clickable_selectors = [
-                        "button",
-                        "a",
-                        "[class*='name']",
-                        ".cell--name",
-                        ".result-name",
-                        ".item-name"
-                    ]
-                    
-                    clickable_element = None
-                    for selector in clickable_selectors:
-                        try:
-                            clickable_elements = result.find_elements(By.CSS_SELECTOR, selector)
-                            if clickable_elements:
-                                clickable_element = clickable_elements[0]  # Take the first clickable element
-                                # print(f"      ✓ Found clickable element with selector: {selector}")
-                                break
-                        except:
-                            continue
+                    clickable_elements = selector_registry.locate(result, "result_toggle")
+                    clickable_element = clickable_elements[0] if clickable_elements else None
                     
                     # If no specific clickable element found, try clicking the result itself
                     if not clickable_element:
@@ -407,41 +417,46 @@ def click_all_search_results(driver, place_name):
                     
                     # Scroll the clickable element into view
                     driver.execute_script("arguments[0].scrollIntoView(true);", clickable_element)
-                    time.sleep(0.01)
 
-                    # Check if current tab URL contains cbr.nl
-                    while("cbr.nl" not in driver.current_url.lower()):
-                        print("closing tab")
-                        # close current tab
-                        driver.close()  
+                    # Close tabs an earlier click opened (e.g. a school's website) and go back to the results tab
+                    if len(driver.window_handles) > 1:
+                        print(f"      Closed {close_stray_tabs(driver)} stray tab(s)")
                     
                     # Try to click using JavaScript if regular click fails
-                    try:
-                        clickable_element.click()
-                        # print(f"      ✓ Successfully clicked on result {i+1}")
-                    except Exception as click_error:
-                        # print(f"      ⚠️ Regular click failed, trying JavaScript click: {str(click_error)}")
+                    with span("result_click"):
                         try:
-                            driver.execute_script("arguments[0].click();", clickable_element)
-                            print(f"      ✓ Successfully clicked on result {i+1} using JavaScript")
-                        except Exception as js_error:
-                            print(f"      ✗ JavaScript click also failed: {str(js_error)}")
-                            continue
+                            clickable_element.click()
+                            # print(f"      ✓ Successfully clicked on result {i+1}")
+                        except Exception as click_error:
+                            # print(f"      ⚠️ Regular click failed, trying JavaScript click: {str(click_error)}")
+                            try:
+                                driver.execute_script("arguments[0].click();", clickable_element)
+                                print(f"      ✓ Successfully clicked on result {i+1} using JavaScript")
+                            except Exception as js_error:
+                                print(f"      ✗ JavaScript click also failed: {str(js_error)}")
+                                record_result(place_name, rid, FAILED)
+                                continue
                     
-                    # Wait a bit for the result to load/expand
-                    time.sleep(0.01)
+                    # Wait for the result's detail panel to expand
+                    wait_for(driver, "details", lambda d: result.find_elements(By.CSS_SELECTOR, DETAILS_SELECTOR))
                     
                     # Extract data from this specific result
-                    entry = extract_driving_school_data_from_result(driver, place_name, i+1)
-
-                    # Wait a bit before next result
+                    with span("extract"):
+                        if pipeline:
+                            # Only take the snapshot here, parsing and saving happen on the pipeline threads
+                            html = driver.execute_script("return arguments[0].outerHTML;", result)
+                            pipeline.submit(place_name, rid, html)
+                        else:
+                            entry = extract_driving_school_data_from_result(driver, place_name, i+1, result, rid)
+                            # extract_driving_school_data_from_result returns True when extraction failed
+                            result_saved(place_name, rid, entry is not True)
 
                     # Click the element again so that this result is deselected
                     clickable_element.click()
-                    time.sleep(0.01)
                     
                 except Exception as e:
                     print(f"      ✗ Error processing result {i+1}: {str(e)}")
+                    record_result(place_name, rid, FAILED)
                     # Try to return to results page even if there was an error
                     # try:
                     #     driver.back()
@@ -450,61 +465,47 @@ def click_all_search_results(driver, place_name):
                     #     pass
                     continue
             
+            if seen_rids is not None or changed_rids is not None:
+                if seen_rids is not None:
+                    seen_rids.count_skipped(skipped_known)
+                print(f"  ⏭️ Skipped {skipped_known} already known schools for {place_name} ({skipped_known} clicks saved)")
             print(f"  ✓ Finished processing all {len(all_results)} search results for {place_name}")
+            return True
             
+        elif shows_no_results(driver):
+            print(f"  ∅ Geen resultaten voor {place_name}")
+            return NO_RESULTS
         else:
             print(f"  ✗ Could not find any search results for {place_name}")
             
     except Exception as e:
         print(f"  ✗ Error processing search results for {place_name}: {str(e)}")
+    return False
 
 
-def extract_driving_school_data_from_result(driver, place_name, result_number) -> str:
-    entry = ""
+def extract_driving_school_data_from_result(driver, place_name, result_number, result=None, rid=None) -> str:
     """Extract driving school information from a specific clicked result."""
     print(f"      📊 Extracting data from result {result_number} for {place_name}")
     
-    try:        
-        time.sleep(0.01)
-        try:
-            school_name = extract_school_name(driver)
-            print(f"Rijschool naam: {school_name}")
-        except Exception as e:
-            school_name = None
-        
-        try:
-            email_address = extract_email_address(driver)
-            print(f"Email: {email_address}")
-        except Exception as e:
-            email_address = None
-        
-        try:
-            phone_number = extract_phone_number(driver)
-            print(f"Telefoon: {phone_number}")
-        except Exception as e:
-            phone_number = None
-        
-        try:
-            website = extract_website(driver)
-            print(f"Website: {website}")
-        except Exception as e:
-            website = None
-        
-        entry = f"{school_name},{phone_number},{email_address},{website}"
-        if(entry not in entries):
-            print(f"Entry: {entry}")
-            # add row to rijscholen_leads.csv
-            if(email_address is None):
-                with open('leads_no_email.csv', 'a', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.writer(csvfile)
-                    writer.writerow([entry])
-            else:
-                with open('rijscholen_leads.csv', 'a', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.writer(csvfile)
-                    writer.writerow([entry])
-        else:
-            print(f"Entry already exists: {entry}")
-        return entry
+    try:
+        record = None
+        if result is not None:
+            # One round trip for the expanded result's HTML, parsed locally into all four fields
+            try:
+                html = driver.execute_script("return arguments[0].outerHTML;", result)
+                record = parse_result_html(html, rid)
+            except Exception as e:
+                print(f"        ⚠️ Snapshot van result {result_number} mislukt, terugvallen op losse velden: {str(e)}")
+
+        if record is None:
+            # Search only inside the result, so links in the page header/footer can't end up in the lead
+            record = extract_record_from_page(result if result is not None else driver)
+
+        print(f"Rijschool naam: {record.name}")
+        print(f"Email: {record.email}")
+        print(f"Telefoon: {record.phone}")
+        print(f"Website: {record.website}")
+        return save_entry(Lead.from_record(record, place_name, rid))
             
     except Exception as e:
         print(f"        ✗ Fout bij extractie van data uit result {result_number}: {str(e)}")
@@ -512,8 +513,68 @@ def extract_driving_school_data_from_result(driver, place_name, result_number) -
         return True  # Continue to next result even if there was an error
 
 
-def extract_school_name(driver):
-    """Extract the school name from the current page."""
+def root_text(root):
+    """Visible text of a result element, or of the page body when root is the driver itself."""
+    if isinstance(root, WebElement):
+        return root.text
+    return root.find_element(By.TAG_NAME, "body").text
+
+
+def extract_record_from_page(root) -> Record:
+    """Extract a Record field by field through WebDriver. Slow: every field is several round trips.
+    root is the expanded result element; only the elements inside it are searched."""
+    record = Record()
+    try:
+        with span("extract_name"):
+            record.name = extract_school_name(root)
+    except Exception as e:
+        pass
+
+    try:
+        with span("extract_email"):
+            record.email = extract_email_address(root)
+    except Exception as e:
+        pass
+
+    try:
+        with span("extract_phone"):
+            record.phone = extract_phone_number(root)
+    except Exception as e:
+        pass
+
+    try:
+        with span("extract_website"):
+            record.website = extract_website(root)
+    except Exception as e:
+        pass
+    return record
+
+
+def seen_store():
+    """The dedup store of saved entries, created with the default size if main() didn't create one."""
+    global seen
+    with _seen_lock:
+        if seen is None:
+            seen = DedupStore()
+        return seen
+
+
+def save_entry(lead) -> str:
+    """Add a lead to the lead store unless the same school/phone/email/website entry was already saved."""
+    entry = lead.entry_key()
+    if(seen_store().claim("entry", lead_entry(lead))):
+        print(f"Entry: {entry}")
+        lead_store.add(lead)
+        count("new_leads")
+        if yield_model and lead.place:
+            yield_model.count_new_lead(lead.place)
+    else:
+        print(f"Entry already exists: {entry}")
+    return entry
+
+
+def extract_school_name(root):
+    """Extract the school name from the result element root."""
     try:
         # Set a timeout for this operation
         start_time = time.time()
@@ -545,7 +606,7 @@ def extract_school_name(driver):
                 break
                 
             try:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                elements = root.find_elements(By.CSS_SELECTOR, selector)
                 for element in elements:
                     try:
                         name_text = element.text.strip().replace(',', '')
@@ -563,37 +624,22 @@ def extract_school_name(driver):
                             not name_text.startswith("Geen") and
                             not name_text.startswith("Niet") and
                             not name_text.lower().startswith("klik") and
-                            not name_text.lower().startswith("selecteer") and
-                            not name_text.lower().replace(',', '') in found_schoolnames):
+                            not name_text.lower().startswith("selecteer")):
                             print(selector)
-                            found_schoolnames.add(name_text.lower().replace(',', ''))
                             return name_text
                     except Exception as element_error:
                         continue
             except Exception as selector_error:
                 continue
         
-        # If no name found with selectors, try to find it in the page title or URL
-        try:
-            page_title = driver.title
-            if page_title and "rijschool" in page_title.lower():
-                # Extract school name from title
-                title_parts = page_title.split('-')
-                if len(title_parts) > 1:
-                    potential_name = title_parts[0].strip()
-                    if len(potential_name) > 3:
-                        return potential_name
-        except Exception as title_error:
-            pass
-        
         return None
     except Exception as e:
         print(f"        ✗ Fout bij extractie van rijschool naam: {str(e)}")
         return None
 
 
-def extract_email_address(driver):
-    """Extract email address from the current page."""
+def extract_email_address(root):
+    """Extract email address from the result element root."""
     try:
         # Set a timeout for this operation
         start_time = time.time()
@@ -622,7 +668,7 @@ def extract_email_address(driver):
                 break
                 
             try:
-                email_elements = driver.find_elements(By.CSS_SELECTOR, email_selector)
+                email_elements = root.find_elements(By.CSS_SELECTOR, email_selector)
                 if email_elements:
                     for email_element in email_elements:
                         try:
@@ -634,20 +680,17 @@ def extract_email_address(driver):
                                 email_address = email_href[7:]  # Remove 'mailto:' prefix
                                 if '@' in email_address and '.' in email_address:
                                     # Basic email validation
-                                    if len(email_address) > 5 and '@' in email_address.split('.')[0] and email_address not in found_emails:
-                                        found_emails.add(email_address.replace(',', ''))
+                                    if len(email_address) > 5 and '@' in email_address.split('.')[0]:
                                         print(email_selector)
                                         return email_address
                             elif '@' in email_href and '.' in email_href:
                                 # Basic email validation
-                                if len(email_href) > 5 and '@' in email_href.split('.')[0] and email_href not in found_emails:
-                                    found_emails.add(email_href.replace(',', ''))
+                                if len(email_href) > 5 and '@' in email_href.split('.')[0]:
                                     print(email_selector)
                                     return email_href
                             elif '@' in email_text and '.' in email_text:
                                 # Basic email validation
-                                if len(email_text) > 5 and '@' in email_text.split('.')[0] and email_text not in found_emails:
-                                    found_emails.add(email_text.replace(',', ''))
+                                if len(email_text) > 5 and '@' in email_text.split('.')[0]:
                                     print(email_selector)
                                     return email_text
                                 
@@ -659,7 +702,7 @@ def extract_email_address(driver):
         
         # If no email found with selectors, try a broader text search
         # try:
-        #     page_text = driver.find_element(By.TAG_NAME, "body").text
+        #     page_text = root_text(root)
         #     # Simple regex to find email patterns
         #     import re
         #     email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
@@ -675,8 +718,8 @@ def extract_email_address(driver):
         return None
 
 
-def extract_phone_number(driver):
-    """Extract phone number from the current page."""
+def extract_phone_number(root):
+    """Extract phone number from the result element root."""
     try:
         # Set a timeout for this operation
         start_time = time.time()
@@ -706,7 +749,7 @@ def extract_phone_number(driver):
                 break
                 
             try:
-                phone_elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                phone_elements = root.find_elements(By.CSS_SELECTOR, selector)
                 for phone_element in phone_elements:
                     try:
                         phone_href = phone_element.get_attribute('href') or ''
@@ -714,22 +757,18 @@ def extract_phone_number(driver):
                         
                         # Extract phone from href (remove tel: prefix)
                         if phone_href.startswith('tel:'):
-                            phone_number = phone_href[4:]  # Remove 'tel:' prefix
+                            phone_number = clean_phone(phone_href)
                             if phone_number and len(phone_number) > 5:
                                 # Basic validation - should contain digits
-                                if any(char.isdigit() for char in phone_number) and phone_number not in found_phone_numbers:
+                                if any(char.isdigit() for char in phone_number):
                                     print(selector)
-                                    found_phone_numbers.add(phone_number.replace(',', ''))
                                     return phone_number
                         elif phone_text and len(phone_text) > 5:
-                            # Check if it looks like a phone number
-                            if any(char.isdigit() for char in phone_text) and phone_text not in found_phone_numbers:
-                                # Remove common prefixes and clean up
-                                cleaned_text = phone_text.replace('+31', '').replace('0031', '').replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-                                if len(cleaned_text) >= 8 and cleaned_text.isdigit():
-                                    print(selector)
-                                    found_phone_numbers.add(phone_text.replace(',', ''))
-                                    return phone_text  # Return original text for display
+                            # The link text, in E.164 like the href, when it holds a Dutch phone number
+                            phone_number = clean_phone(phone_text)
+                            if phone_number and phone_number.startswith('+31'):
+                                print(selector)
+                                return phone_number
                     except Exception as element_error:
                         continue
             except Exception as selector_error:
@@ -737,20 +776,10 @@ def extract_phone_number(driver):
         
         # If no phone found with selectors, try a broader text search
         try:
-            page_text = driver.find_element(By.TAG_NAME, "body").text
-            # Simple regex to find phone patterns (Dutch format)
-            import re
-            phone_patterns = [
-                r'\b0[1-9][0-9]{7,8}\b',  # Dutch landline: 0xx xxxxxxx
-                r'\b06[0-9]{8}\b',        # Dutch mobile: 06 xxxxxxxx
-                r'\b\+31[0-9]{9}\b',      # International Dutch: +31 xxxxxxxx
-                r'\b0031[0-9]{9}\b'       # International Dutch: 0031 xxxxxxxx
-            ]
-            
-            for pattern in phone_patterns:
-                phones = re.findall(pattern, page_text.replace(' ', ''))
-                if phones:
-                    return phones[0]  # Return the first phone found
+            page_text = root_text(root)
+            phones = parse_contacts(page_text).phones
+            if phones:
+                return phones[0]  # Return the first phone found
         except Exception as text_error:
             pass
         
@@ -760,8 +789,8 @@ def extract_phone_number(driver):
         return None
 
 
-def extract_website(driver):
-    """Extract website URL from the current page."""
+def extract_website(root):
+    """Extract website URL from the result element root."""
     try:
         # Set a timeout for this operation
         start_time = time.time()
@@ -792,7 +821,7 @@ def extract_website(driver):
                 break
                 
             try:
-                website_elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                website_elements = root.find_elements(By.CSS_SELECTOR, selector)
                 for website_element in website_elements:
                     try:
                         website_href = website_element.get_attribute('href') or ''
@@ -803,14 +832,14 @@ def extract_website(driver):
                             # Basic validation - should be a website URL
                             if len(website_href) > 10 and '.' in website_href:
                                 # Filter out common non-website URLs
-                                if not any(exclude in website_href.lower() for exclude in ['mailto:', 'tel:', 'javascript:', '#']):
+                                if not any(exclude in website_href.lower() for exclude in ['mailto:', 'tel:', 'javascript:', '#']) and not is_chrome_link(website_href):
                                     print(selector)
                                     return website_href
                         elif website_text and ('http://' in website_text or 'https://' in website_text or 'www.' in website_text):
                             # Check if text looks like a website URL
                             if len(website_text) > 10 and '.' in website_text:
                                 # Filter out common non-website URLs
-                                if not any(exclude in website_text.lower() for exclude in ['mailto:', 'tel:', 'javascript:', '#']):
+                                if not any(exclude in website_text.lower() for exclude in ['mailto:', 'tel:', 'javascript:', '#']) and not is_chrome_link(website_text):
                                     print(selector)
                                     return website_text
                     except Exception as element_error:
@@ -820,26 +849,11 @@ def extract_website(driver):
         
         # If no website found with selectors, try a broader text search
         try:
-            page_text = driver.find_element(By.TAG_NAME, "body").text
-            # Simple regex to find website patterns
-            import re
-            website_patterns = [
-                r'https?://[^\s<>"]+',
-                r'www\.[^\s<>"]+',
-                r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-            ]
-            
-            for pattern in website_patterns:
-                websites = re.findall(pattern, page_text)
-                for website in websites:
-                    # Basic validation
-                    if len(website) > 10 and '.' in website:
-                        # Filter out common non-website URLs
-                        if not any(exclude in website.lower() for exclude in ['mailto:', 'tel:', 'javascript:', '#', '@']):
-                            # Add http:// if no protocol specified
-                            if not website.startswith(('http://', 'https://')):
-                                website = 'http://' + website
-                            return website
+            page_text = root_text(root)
+            for website in parse_contacts(page_text).urls:
+                # Basic validation
+                if len(website) > 10 and not any(exclude in website.lower() for exclude in WEBSITE_EXCLUDES) and not is_chrome_link(website):
+                    return website
         except Exception as text_error:
             pass
         
@@ -849,36 +863,310 @@ def extract_website(driver):
         return None
 
 
+def print_page_reuse_report():
+    """Print how much setting up a place cost with a full reload and in a reused page, and the time saved."""
+    summary = metrics.latency_summary()
+    full, reused = summary.get("setup_full"), summary.get("setup_reused")
+    if not full or not reused:
+        return
+    full_mean = full["total"] / full["count"]
+    reused_mean = reused["total"] / reused["count"]
+    fallbacks = metrics.counters["page_reload_fallbacks"]
+    print(f"\n🔁 Page reuse: {full_mean:.2f}s per place with a full reload, {reused_mean:.2f}s in the loaded page "
+          f"({reused['count']} places reused, {fallbacks} reloads after a bad page state)")
+    print(f"   Saved {full_mean - reused_mean:.2f}s per reused place, "
+          f"{(full_mean - reused_mean) * reused['count']:.1f}s in total")
+
+
+def create_driver():
+    """Start a new tuned browser session with the scraper's browser options."""
+    return browser_profile.create_driver(browser, headless, block_resources)
+
+
+def place_finished(place, status=COMPLETED):
+    """All of a place's leads were handed to the lead store: close its yield visit and journal it once they're on disk."""
+    if yield_model:
+        yield_model.finish_visit(place)
+    if journal:
+        lead_store.when_written(lambda: journal.record_place(place, status))
+
+
+def stop_remaining(place_queue):
+    """Journal the places still queued as stopped early, so the supervisor doesn't take them for failures."""
+    while True:
+        try:
+            _, place = place_queue.get_nowait()
+        except queue.Empty:
+            return
+        if journal:
+            journal.record_place(place, STOPPED_EARLY)
+        place_queue.task_done()
+
+
+def scrape_worker(worker_id, place_queue, total_places):
+    """Take places from the shared queue and process each with a healthy browser session leased from driver_manager."""
+    try:
+        while not stop_requested.is_set():
+            if yield_model and yield_model.should_stop():
+                print(f"⏹️ [worker {worker_id}] The last places gave only {yield_model.marginal_yield():.2f} "
+                      f"new leads per place, stopping early")
+                stop_remaining(place_queue)
+                break
+            try:
+                index, place = place_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            print(f"\n--- [worker {worker_id}] Processing place {index+1}/{total_places}: {place} ---")
+            place_done = False
+            if yield_model:
+                yield_model.start_visit(place)
+            try:
+                with driver_manager.lease() as driver:
+                    with (profiled(profile_file) if place == profile_place else nullcontext()):
+                        with span("place"):
+                            place_done = process_place(driver, place)
+            finally:
+                count("places")
+                if not place_done:
+                    count("place_failures")
+                status = NO_RESULTS if place_done == NO_RESULTS else COMPLETED
+                if place_done and pipeline:
+                    # Its results may still be queued: the writer finishes the place after its last lead
+                    pipeline.finish_place(place, lambda place=place, status=status: place_finished(place, status))
+                elif place_done:
+                    place_finished(place, status)
+                elif journal:
+                    journal.record_place(place, FAILED)
+                metrics.export()
+                place_queue.task_done()
+    except Exception as e:
+        print(f"✗ Worker {worker_id} stopped: {str(e)}")
+
+
+def run_worker_pool(places, num_workers=1):
+    """Process all places with a pool of num_workers independent browser sessions."""
+    place_queue = queue.Queue()
+    for i, place in enumerate(places):
+        place_queue.put((i, place))
+
+    global driver_manager
+    num_workers = max(1, min(num_workers, len(places)))
+    driver_manager = DriverManager(create_driver, recycle_after, max_browser_mb, spare_drivers)
+    workers = [
+        threading.Thread(target=scrape_worker, args=(worker_id + 1, place_queue, len(places)), daemon=True)
+        for worker_id in range(num_workers)
+    ]
+    print(f"Starting {num_workers} browser session(s) for {len(places)} places")
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        print("\n⏹️ Ctrl-C: workers stop after their current result, saving everything in flight...")
+        stop_requested.set()
+        for worker in workers:
+            worker.join(timeout=max(WAIT_TIMEOUTS.values()) + 10)
+        raise
+    finally:
+        driver_manager.close()
+        driver_manager.print_stats()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape driving school leads from the CBR rijschoolzoeker.")
+    parser.add_argument("--engine", choices=["selenium", "http"], default="selenium",
+                        help="selenium clicks through the page, http fetches the page's JSON directly "
+                             "(experimental, needs --experimental-http-engine; default: selenium)")
+    parser.add_argument("--experimental-http-engine", action="store_true",
+                        help="Allow --engine http. Its API endpoints are not confirmed against a capture of the "
+                             "live site yet; use it against standin_server.py")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of parallel browser sessions, or concurrent requests for --engine http (default: 1)")
+    parser.add_argument("--url", default=RIJSCHOOLZOEKER_URL,
+                        help="Rijschoolzoeker URL, e.g. http://127.0.0.1:8000/nl/rijschoolzoeker for standin_server.py")
+    parser.add_argument("--output-dir", default=".", help="Directory for the lead files (default: current directory)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="Lead file format (default: csv)")
+    parser.add_argument("--db", metavar="PATH",
+                        help="Save leads in this SQLite database instead of lead files (export with lead_db.py)")
+    parser.add_argument("--lead-batch", type=int, metavar="N",
+                        help="Write the leads to disk every N leads (default: 25 for lead files, 50 for --db); "
+                             "1 loses nothing when the process is killed")
+    parser.add_argument("--dedup-keys", type=int, default=DEFAULT_EXPECTED_KEYS, metavar="N",
+                        help="Size the dedup Bloom filter for N keys, 0 to check every key on disk "
+                             f"(default: {DEFAULT_EXPECTED_KEYS})")
+    parser.add_argument("--places", default="examen_plaatsen.json",
+                        help="Place list to search (default: examen_plaatsen.json)")
+    parser.add_argument("--yield-model", default="place_yield.json",
+                        help="File with the results and new leads per place of earlier runs, relative to --output-dir "
+                             "(default: place_yield.json)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Search the places that gave the most new leads per visit, and places never searched, first")
+    parser.add_argument("--min-yield", type=float,
+                        help="Stop when the last --yield-window places gave fewer new leads per place than this")
+    parser.add_argument("--yield-window", type=int, default=10,
+                        help="Number of recent places --min-yield averages over (default: 10)")
+    parser.add_argument("--start", type=int, default=0, help="Skip the first START places of the place list")
+    parser.add_argument("--journal", default="progress.journal",
+                        help="Progress journal file, relative to --output-dir (default: progress.journal)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the previous run: skip places and results the journal marks as done, retry failures")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Parse and save results on separate threads so the browsers only click and snapshot")
+    parser.add_argument("--parsers", type=int, default=2, help="Number of parser threads for --pipeline (default: 2)")
+    parser.add_argument("--seen-rids", default="seen_rids.txt",
+                        help="File with the data-rids scraped in earlier runs, relative to --output-dir (default: seen_rids.txt)")
+    parser.add_argument("--rescrape-known", action="store_true",
+                        help="Click and extract every result, also schools whose data-rid was scraped before")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Incremental refresh: only click results that are new or whose row changed since the last run")
+    parser.add_argument("--row-hashes", default="row_hashes.json",
+                        help="Row hashes of the last run for --refresh, relative to --output-dir (default: row_hashes.json)")
+    parser.add_argument("--change-report", default="refresh_report.json",
+                        help="Where --refresh writes the added/removed/modified results, relative to --output-dir "
+                             "(default: refresh_report.json)")
+    parser.add_argument("--selector-stats", default="selector_stats.json",
+                        help="Selector timings kept across runs, relative to --output-dir (default: selector_stats.json)")
+    parser.add_argument("--metrics-json", metavar="PATH", help="Write counters and stage histograms as JSON to PATH")
+    parser.add_argument("--metrics-prom", metavar="PATH",
+                        help="Write counters and stage histograms in the Prometheus text format to PATH "
+                             "(e.g. for the node exporter's textfile collector)")
+    parser.add_argument("--profile-place", metavar="PLACE",
+                        help="Run this one place under cProfile and save the profile next to the lead files")
+    parser.add_argument("--http-cache", default="http_cache", metavar="DIR",
+                        help="Response cache of the http engine, next to the lead files (default: http_cache)")
+    parser.add_argument("--no-http-cache", action="store_true", help="Fetch everything again, without the response cache")
+    parser.add_argument("--cache-ttl", type=float, default=12,
+                        help="Hours a cached response is used without asking the site again (default: 12)")
+    parser.add_argument("--cache-max-mb", type=float, default=512,
+                        help="Size of the response cache before the least recently used responses go (default: 512)")
+    parser.add_argument("--reuse-page", action="store_true",
+                        help="Load the rijschoolzoeker once per worker and only change the place for the next one, "
+                             "keeping the vehicle and sort (full reload when the page state is off)")
+    parser.add_argument("--recycle-after", type=int, default=DEFAULT_RECYCLE_AFTER,
+                        help=f"Start a fresh browser session after this many places (default: {DEFAULT_RECYCLE_AFTER})")
+    parser.add_argument("--max-browser-mb", type=float,
+                        help="Also start a fresh browser session once one uses more memory than this")
+    parser.add_argument("--spares", type=int, default=1,
+                        help="Browser sessions kept started in the background to replace recycled ones (default: 1)")
+    parser.add_argument("--browser", choices=browser_profile.BROWSERS, default="edge",
+                        help="Browser for the selenium engine (default: edge)")
+    parser.add_argument("--headed", action="store_true", help="Show the browser windows instead of running headless")
+    parser.add_argument("--load-all-resources", action="store_true",
+                        help="Don't block images, media, fonts and tracker domains")
+    parser.add_argument("--wait", action="append", default=[], metavar="STAGE=SECONDS",
+                        help=f"Maximum wait per stage, can be repeated. Stages: {', '.join(WAIT_TIMEOUTS)}")
+    args = parser.parse_args()
+    if args.engine == "http" and not args.experimental_http_engine:
+        parser.error("--engine http is experimental: its endpoints (http_engine.SEARCH_ENDPOINT/DETAIL_ENDPOINT) "
+                     "are not confirmed against the live site yet. Add --experimental-http-engine to use it anyway.")
+    return args
+
+
+def parse_wait_timeouts(values):
+    """Apply --wait stage=seconds overrides to WAIT_TIMEOUTS."""
+    for value in values:
+        stage, _, seconds = value.partition("=")
+        if stage not in WAIT_TIMEOUTS:
+            raise SystemExit(f"Unknown wait stage '{stage}', choose from: {', '.join(WAIT_TIMEOUTS)}")
+        WAIT_TIMEOUTS[stage] = float(seconds)
+
+
 if __name__ == "__main__":
-    with open('leads_no_email.csv', 'r') as file:
-        reader = csv.reader(file)
-        next(reader) # Skip header row
-        for row in reader:
-            entries.add(row[0])
-
-    with open('rijscholen_leads.csv', 'r') as file:
-        reader = csv.reader(file)
-        next(reader) # Skip header row
-        for row in reader:
-            entries.add(row[0])
-    print(entries)
+    args = parse_args()
+    RIJSCHOOLZOEKER_URL = args.url
+    parse_wait_timeouts(args.wait)
+    seen = DedupStore(expected_keys=args.dedup_keys)
+
+    if args.db:
+        # The database dedups on rid, email and phone itself, so earlier leads don't have to be loaded
+        from lead_db import LeadDB
+        lead_store = LeadDB(args.db, **({"batch_size": args.lead_batch} if args.lead_batch else {}))
+        print(f"Saving leads to {args.db} ({len(lead_store)} leads so far)")
+    else:
+        lead_store = LeadStore(args.output_dir, args.format, **({"batch_size": args.lead_batch} if args.lead_batch else {}))
+        for lead in lead_store.existing_leads():
+            seen.claim("entry", lead_entry(lead))
+        print(f"Loaded {len(seen)} existing entries")
 
     # Load Dutch place names
-    places = load_dutch_places()
+    places = load_dutch_places(args.places)
     if not places:
         print("No places loaded. Exiting.")
         exit(1)
     
-    print(f"Loaded {len(places)} Dutch places from JSON file.")
-    
-    edge_options = Options()
-    edge_options.add_argument("--headless=false")
-    edge_options.add_argument("--start-maximized")
-    driver = webdriver.Edge(options=edge_options)
+    print(f"Loaded {len(places)} Dutch places from {args.places}.")
+
+    metrics.set_export_paths(args.metrics_json, args.metrics_prom)
+    browser = args.browser
+    headless = not args.headed
+    block_resources = not args.load_all_resources
+    reuse_page = args.reuse_page
+    recycle_after = args.recycle_after
+    max_browser_mb = args.max_browser_mb
+    spare_drivers = args.spares
+    if args.profile_place:
+        profile_place = args.profile_place
+        profile_file = os.path.join(args.output_dir, "profile_" + re.sub(r"\W+", "_", profile_place.lower()) + ".prof")
+    selector_registry = SelectorRegistry(os.path.join(args.output_dir, args.selector_stats))
+    journal = ProgressJournal(os.path.join(args.output_dir, args.journal), resume=args.resume)
+    if args.refresh:
+        refresh_index = RefreshIndex(os.path.join(args.output_dir, args.row_hashes))
+    elif not args.rescrape_known:
+        seen_rids = RidIndex(os.path.join(args.output_dir, args.seen_rids))
+        print(f"Loaded {len(seen_rids)} known data-rids")
+    places = places[args.start:]
+    if args.resume:
+        finished = [place for place in places if journal.is_place_done(place)]
+        places = [place for place in places if not journal.is_place_done(place)]
+        print(f"Resuming: skipping {len(finished)} places that are already done, {len(places)} to go")
+
+    yield_model = YieldModel(os.path.join(args.output_dir, args.yield_model),
+                             window=args.yield_window, min_yield=args.min_yield)
+    if args.adaptive:
+        places = yield_model.order(places)
+        print(f"Adaptive order: starting with {', '.join(places[:5])}")
     
+    if args.pipeline:
+        pipeline = ScrapePipeline(save_entry, on_saved=result_saved, num_parsers=args.parsers)
+
     # Process each place (you can limit the number by changing the range)
-    for i, place in enumerate(places[3:]):  # Process first 50 places as an example
-        print(f"\n--- Processing place {i+1}/{len(places)}: {place} ---")
-        process_place(driver, place)
-        driver.quit()
-        driver = webdriver.Edge(options=edge_options)
\ No newline at end of file
+    try:
+        if args.engine == "http":
+            from http_engine import run_http_engine
+            if not args.no_http_cache:
+                from http_cache import ResponseCache
+                http_cache = ResponseCache(os.path.join(args.output_dir, args.http_cache), args.cache_ttl * 3600,
+                                           int(args.cache_max_mb * 1024 * 1024))
+            run_http_engine(places, RIJSCHOOLZOEKER_URL, save_entry, lead_store.when_written, args.workers,
+                            journal, seen_rids, yield_model, refresh_index, profile_place, profile_file, http_cache)
+        else:
+            run_worker_pool(places, args.workers)
+    except KeyboardInterrupt:
+        print("⏹️ Run interrupted")
+    finally:
+        if pipeline:
+            pipeline.close()
+            pipeline.print_stats()
+        lead_store.close()
+        journal.close()
+        selector_registry.save()
+        print(f"Progress: {journal.summary()}")
+        if seen_rids is not None:
+            seen_rids.close()
+            print(f"Skipped {seen_rids.clicks_saved} results of already known schools")
+        if refresh_index is not None:
+            refresh_index.close()
+            report_path = os.path.join(args.output_dir, args.change_report)
+            refresh_index.write_report(report_path)
+            print(f"Refresh: {refresh_index.summary()}, report saved to {report_path}")
+        if http_cache is not None:
+            http_cache.print_stats()
+            http_cache.close()
+        seen.print_stats()
+        seen.close()
+
+    metrics.export()
+    print_latency_report()
+    print_page_reuse_report()
@@ -0,0 +1,257 @@
+import argparse
+import hashlib
+import os
+import resource
+import sqlite3
+import threading
+import time
+from array import array
+
+from lead_store import normalize_email, normalize_name, normalize_phone
+
+# Dedup state of a scrape run: which entries, school names, emails, phone numbers and websites
+# were already seen. Every value is normalized per kind (so "Info@X.nl" and "info@x.nl", or
+# "072-1234567" and "+31 72 123 4567", are the same key) and only a 64-bit blake2b hash of kind
+# and normalized value is kept. At 10M keys the chance that two different keys share a hash is
+# about 3 in a million.
+#
+# The exact set of hashes lives in SQLite on disk (by default a private temporary database that
+# is deleted on close), so memory doesn't grow with the number of keys. In front of it sits a
+# Bloom filter sized for expected_keys: a key the filter has never seen is new for sure and is
+# claimed without touching the disk. New hashes are written in batches of batch_size. Past
+# expected_keys the filter's false-positive rate goes up, which costs lookups but never
+# correctness.
+KINDS = ("entry", "name", "email", "phone", "website")
+DEFAULT_EXPECTED_KEYS = 1_000_000
+MASK64 = (1 << 64) - 1
+
+
+def normalize_website(url):
+    """Dedup key for a website: lowercase, without scheme, www. and trailing slash."""
+    url = (url or "").strip().lower()
+    for prefix in ("https://", "http://", "www."):
+        if url.startswith(prefix):
+            url = url[len(prefix):]
+    return url.rstrip("/") or None
+
+
+NORMALIZERS = {
+    "name": normalize_name,
+    "email": normalize_email,
+    "phone": normalize_phone,
+    "website": normalize_website,
+}
+
+
+def lead_entry(lead):
+    """The normalized 'school, phone, email, website' entry of a lead, for the "entry" kind."""
+    return "\x1f".join(NORMALIZERS[kind](value) or "" for kind, value in (
+        ("name", lead.name), ("phone", lead.phone), ("email", lead.email), ("website", lead.website)))
+
+
+def key_hash(kind, value):
+    """Signed 64-bit hash of kind and the normalized value (SQLite's integer range), or None for an empty value."""
+    key = NORMALIZERS[kind](value) if kind in NORMALIZERS else (value or None)
+    if not key:
+        return None
+    digest = hashlib.blake2b(f"{kind}\x00{key}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class BloomFilter:
+    """Blocked Bloom filter over 64-bit hashes: all bits of a key are in one 64-bit word.
+
+    One word lookup per key instead of one per bit position. The mask of a key is the AND of three
+    multiplicative mixes of its hash, about 8 of the 64 bits. At 20 bits per key the measured
+    false-positive rate at expected_keys is 0.8% (16 bits per key gave 1.4%).
+    """
+
+    def __init__(self, expected_keys, bits_per_key=20):
+        self.size = max(1, expected_keys * bits_per_key // 64)
+        self.words = array("Q", bytes(8 * self.size))
+
+    def slot(self, value):
+        """(word index, bit mask) of a hash."""
+        value &= MASK64
+        mask = ((value * 0x9E3779B97F4A7C15) >> 32) & ((value * 0xC2B2AE3D27D4EB4F) >> 32) \
+            & ((value * 0x165667B19E3779F9) >> 32) & MASK64
+        return (value >> 40) % self.size, mask or 1
+
+    def add(self, slot):
+        index, mask = slot
+        self.words[index] |= mask
+
+    def might_contain(self, slot):
+        index, mask = slot
+        return self.words[index] & mask == mask
+
+    def clear(self):
+        self.words = array("Q", bytes(8 * self.size))
+
+    def memory_bytes(self):
+        return self.size * 8
+
+
+class DedupStore:
+    """Thread-safe set of hashed, normalized keys per kind, with a Bloom filter front and SQLite backing.
+
+    path "" is a temporary database that is removed on close; pass a file path to keep the keys.
+    Set expected_keys to 0 to run without the Bloom filter.
+    """
+
+    def __init__(self, path="", expected_keys=DEFAULT_EXPECTED_KEYS, batch_size=10000):
+        self.bloom = BloomFilter(expected_keys) if expected_keys else None
+        self.batch_size = batch_size
+        self.pending = set()
+        self.count = 0
+        self.stats = {"claimed": 0, "duplicates": 0, "filter_skips": 0, "disk_lookups": 0}
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=OFF" if not path else "PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS dedup_keys (hash INTEGER PRIMARY KEY) WITHOUT ROWID")
+        self.count = self.connection.execute("SELECT COUNT(*) FROM dedup_keys").fetchone()[0]
+        if self.bloom is not None and self.count:
+            for (value,) in self.connection.execute("SELECT hash FROM dedup_keys"):
+                self.bloom.add(self.bloom.slot(value))
+
+    def _known(self, value, slot):
+        """Whether a hash was stored before (lock held)."""
+        if slot is not None and not self.bloom.might_contain(slot):
+            self.stats["filter_skips"] += 1
+            return False
+        if value in self.pending:
+            return True
+        self.stats["disk_lookups"] += 1
+        return self.connection.execute("SELECT 1 FROM dedup_keys WHERE hash = ?", (value,)).fetchone() is not None
+
+    def _flush(self):
+        if self.pending:
+            with self.connection:
+                self.connection.executemany("INSERT OR IGNORE INTO dedup_keys VALUES (?)",
+                                            ((value,) for value in self.pending))
+            self.pending = set()
+
+    def claim(self, kind, value):
+        """Record a value as seen. Returns True if it is new, False if it was seen before or is empty."""
+        hashed = key_hash(kind, value)
+        if hashed is None:
+            return False
+        slot = self.bloom.slot(hashed) if self.bloom is not None else None
+        with self.lock:
+            if self._known(hashed, slot):
+                self.stats["duplicates"] += 1
+                return False
+            if slot is not None:
+                self.bloom.add(slot)
+            self.pending.add(hashed)
+            self.count += 1
+            self.stats["claimed"] += 1
+            if len(self.pending) >= self.batch_size:
+                self._flush()
+            return True
+
+    def contains(self, kind, value):
+        hashed = key_hash(kind, value)
+        if hashed is None:
+            return False
+        slot = self.bloom.slot(hashed) if self.bloom is not None else None
+        with self.lock:
+            return self._known(hashed, slot)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        """Forget all keys."""
+        with self.lock:
+            self.pending = set()
+            with self.connection:
+                self.connection.execute("DELETE FROM dedup_keys")
+            if self.bloom is not None:
+                self.bloom.clear()
+            self.count = 0
+
+    def memory_bytes(self):
+        """Approximate memory of the filter and the not yet written keys."""
+        bloom_bytes = self.bloom.memory_bytes() if self.bloom is not None else 0
+        return bloom_bytes + len(self.pending) * 64
+
+    def print_stats(self):
+        stats = self.stats
+        print(f"\n🔑 Dedup: {self.count} keys, {stats['claimed']} claimed, {stats['duplicates']} duplicates; "
+              f"{stats['filter_skips']} checks answered by the Bloom filter, {stats['disk_lookups']} on disk")
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            self.connection.close()
+
+
+def _max_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if os.uname().sysname == "Darwin" else rss / 1024
+
+
+def benchmark(num_keys, expected_keys=None, path="", chunk=1_000_000):
+    """Claim num_keys distinct emails, then look up as many known and unknown ones, and print the rates and memory."""
+    rss_before = _max_rss_mb()
+    store = DedupStore(path, num_keys if expected_keys is None else expected_keys)
+    start_time = time.perf_counter()
+    for start in range(0, num_keys, chunk):
+        for i in range(start, min(num_keys, start + chunk)):
+            store.claim("email", f"info{i}@rijschool{i % 9973}.nl")
+        print(f"  {min(num_keys, start + chunk):>11,} keys claimed, {time.perf_counter() - start_time:.1f}s")
+    store.flush()
+    claim_seconds = time.perf_counter() - start_time
+
+    lookups = min(num_keys, 1_000_000)
+    results = {}
+    for name, offset in (("known", 0), ("unknown", num_keys)):
+        start_time = time.perf_counter()
+        for i in range(offset, offset + lookups):
+            store.contains("email", f"info{i}@rijschool{i % 9973}.nl")
+        results[name] = lookups / (time.perf_counter() - start_time)
+
+    disk_bytes = os.path.getsize(path) if path else store.connection.execute(
+        "SELECT page_count * page_size FROM pragma_page_count(), pragma_page_size()").fetchone()[0]
+    print(f"\n{num_keys:,} keys: {num_keys / claim_seconds:,.0f} claims/s, "
+          f"{results['known']:,.0f} lookups/s of known keys, {results['unknown']:,.0f} lookups/s of unknown keys")
+    print(f"Bloom filter {store.memory_bytes() / 1024 / 1024:.1f} MB, "
+          f"on disk {disk_bytes / 1024 / 1024:.1f} MB, "
+          f"peak RSS grew {_max_rss_mb() - rss_before:.1f} MB; {store.stats}")
+    store.close()
+
+
+def benchmark_set(num_keys):
+    """The same claims with a plain Python set of raw strings, as the scraper's found_* sets did."""
+    rss_before = _max_rss_mb()
+    found = set()
+    start_time = time.perf_counter()
+    for i in range(num_keys):
+        value = f"info{i}@rijschool{i % 9973}.nl"
+        if value not in found:
+            found.add(value)
+    seconds = time.perf_counter() - start_time
+    print(f"\nPlain set of strings, {num_keys:,} keys: {num_keys / seconds:,.0f} claims/s, "
+          f"peak RSS grew {_max_rss_mb() - rss_before:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dedup store's memory use and throughput.")
+    parser.add_argument("--keys", type=int, default=10_000_000, help="Number of keys (default: 10000000)")
+    parser.add_argument("--expected-keys", type=int, help="Bloom filter size in keys, 0 for none (default: --keys)")
+    parser.add_argument("--path", default="", help="Keep the keys in this SQLite file (default: a temporary one)")
+    parser.add_argument("--compare-set", action="store_true",
+                        help="Afterwards run the same keys through a plain set of strings (needs a lot of memory)")
+    args = parser.parse_args()
+
+    benchmark(args.keys, args.expected_keys, args.path)
+    if args.compare_set:
+        benchmark_set(args.keys)
@@ -0,0 +1,283 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Lifecycle of the scraper's browser sessions. Workers lease a session per place instead of
+# keeping one for the whole run:
+#   - a leased session is health-checked first: it has to answer a script within health_timeout
+#     seconds (else it's hung or crashed) and every tab but its first one is closed,
+#   - a session is recycled after recycle_after places, or once the browser's processes use more
+#     than max_memory_mb (measured with psutil, or /proc on Linux),
+#   - spare sessions are started in the background, so a recycled or dead session is replaced by
+#     one that is already running instead of waiting for a browser start.
+# Retired sessions are quit in the background too; one that doesn't quit has its driver process killed.
+DEFAULT_RECYCLE_AFTER = 50
+DEFAULT_HEALTH_TIMEOUT = 10
+# Seconds to wait for a spare that is still starting before starting a session of our own
+SPARE_WAIT = 60
+
+
+def _process_tree_rss(pid):
+    """Resident memory in bytes of process pid and all its descendants, or None if it can't be measured."""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            return sum(p.memory_info().rss for p in [process] + process.children(recursive=True))
+        except psutil.Error:
+            return None
+    if not os.path.isdir("/proc"):
+        return None
+
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # The process name is in parentheses and may contain spaces, the parent pid comes after it
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+def browser_memory(driver):
+    """Memory in bytes used by the browser of a session (driver process and everything it started), or None."""
+    try:
+        return _process_tree_rss(driver.service.process.pid)
+    except AttributeError:
+        return None
+
+
+def close_stray_tabs(driver, main_handle=None):
+    """Close every tab but main_handle (default: the first one) and switch back to it. Returns the number closed."""
+    handles = driver.window_handles
+    main_handle = main_handle if main_handle in handles else handles[0]
+    closed = 0
+    for handle in handles:
+        if handle != main_handle:
+            driver.switch_to.window(handle)
+            driver.close()
+            closed += 1
+    driver.switch_to.window(main_handle)
+    return closed
+
+
+def _call_with_timeout(function, timeout):
+    """Run function in a helper thread. Returns (finished, result or exception)."""
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = function()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        return False, None
+    return True, outcome.get("error", outcome.get("result"))
+
+
+class ManagedDriver:
+    """A browser session with its bookkeeping: its first tab, the places it did and when it started."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.main_handle = driver.current_window_handle
+        self.places = 0
+        self.started_at = time.time()
+
+
+class DriverManager:
+    """Hands out healthy browser sessions made by factory, recycles them and keeps warm spares ready."""
+
+    def __init__(self, factory, recycle_after=DEFAULT_RECYCLE_AFTER, max_memory_mb=None, spares=1,
+                 health_timeout=DEFAULT_HEALTH_TIMEOUT):
+        self.factory = factory
+        self.recycle_after = recycle_after
+        self.max_memory = max_memory_mb * 1024 * 1024 if max_memory_mb else None
+        self.spares = spares
+        self.health_timeout = health_timeout
+        self.idle = queue.Queue()
+        self.ready = queue.Queue()
+        self.starting = 0
+        self.waiting = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        self.stats = {"started": 0, "recycled": 0, "memory_recycled": 0, "unhealthy": 0,
+                      "stray_tabs": 0, "cold_starts": 0}
+
+        if self.max_memory and psutil is None and not os.path.isdir("/proc"):
+            print("⚠️ Can't measure browser memory here (install psutil), recycling only by number of places")
+        self._refill()
+
+    def _start(self):
+        managed = ManagedDriver(self.factory())
+        with self.lock:
+            self.stats["started"] += 1
+        return managed
+
+    def _start_spare(self):
+        try:
+            managed = self._start()
+        except Exception as e:
+            print(f"✗ Could not start a spare browser session: {str(e)}")
+            managed = None
+        with self.lock:
+            self.starting -= 1
+            closed = self.closed
+        if managed and closed:
+            self._retire(managed)
+        elif managed:
+            self.ready.put(managed)
+
+    def _refill(self):
+        """Start spare sessions in the background until spares of them are ready or starting."""
+        with self.lock:
+            missing = 0 if self.closed else self.spares - self.ready.qsize() - self.starting
+            self.starting += max(0, missing)
+        for _ in range(max(0, missing)):
+            threading.Thread(target=self._start_spare, daemon=True).start()
+
+    def _retire(self, managed):
+        """Quit a session in the background; kill its driver process if quitting hangs."""
+        def quit_driver():
+            finished, _ = _call_with_timeout(managed.driver.quit, self.health_timeout)
+            if not finished:
+                try:
+                    managed.driver.service.process.kill()
+                except (AttributeError, OSError):
+                    pass
+
+        threading.Thread(target=quit_driver, daemon=True).start()
+
+    def _healthy(self, managed):
+        """Whether a session answers within health_timeout; closes its stray tabs on the way."""
+        def check():
+            closed = close_stray_tabs(managed.driver, managed.main_handle)
+            managed.driver.execute_script("return document.readyState")
+            return closed
+
+        finished, result = _call_with_timeout(check, self.health_timeout)
+        if not finished or isinstance(result, Exception):
+            reason = "hung" if not finished else f"crashed ({type(result).__name__})"
+            print(f"  🩺 Browser session {managed.driver.session_id} is {reason}, replacing it")
+            with self.lock:
+                self.stats["unhealthy"] += 1
+            return False
+        if result:
+            print(f"  🩺 Closed {result} stray tab(s)")
+            with self.lock:
+                self.stats["stray_tabs"] += result
+        return True
+
+    def _take_spare(self):
+        """A warm spare; waits for one that is already starting rather than starting another. None if there is none."""
+        with self.lock:
+            wait = self.ready.empty() and self.starting > self.waiting
+            if wait:
+                self.waiting += 1
+        try:
+            managed = self.ready.get(timeout=SPARE_WAIT) if wait else self.ready.get_nowait()
+        except queue.Empty:
+            return None
+        finally:
+            if wait:
+                with self.lock:
+                    self.waiting -= 1
+        self._refill()
+        return managed
+
+    def _take(self):
+        """A healthy session: an idle one, a warm spare, or (when none is ready) a new one."""
+        while True:
+            try:
+                managed = self.idle.get_nowait()
+            except queue.Empty:
+                managed = self._take_spare()
+                if managed is None:
+                    with self.lock:
+                        self.stats["cold_starts"] += 1
+                    return self._start()
+            if self._healthy(managed):
+                return managed
+            self._retire(managed)
+            self._refill()
+
+    def _needs_recycling(self, managed):
+        if managed.places >= self.recycle_after:
+            return "places"
+        if self.max_memory:
+            memory = browser_memory(managed.driver)
+            if memory and memory > self.max_memory:
+                print(f"  ♻️ Browser session uses {memory / 1024 / 1024:.0f} MB, recycling it")
+                return "memory"
+        return None
+
+    @contextmanager
+    def lease(self):
+        """Lease a healthy session for one place: with manager.lease() as driver: ...
+
+        A session that broke during the place goes back all the same; the health check of its next lease replaces it.
+        """
+        managed = self._take()
+        try:
+            yield managed.driver
+        finally:
+            managed.places += 1
+            self._give_back(managed)
+
+    def _give_back(self, managed):
+        reason = None if self.closed else self._needs_recycling(managed)
+        if self.closed or reason:
+            if reason:
+                with self.lock:
+                    self.stats["recycled"] += 1
+                    if reason == "memory":
+                        self.stats["memory_recycled"] += 1
+            self._retire(managed)
+            self._refill()
+        else:
+            self.idle.put(managed)
+
+    def print_stats(self):
+        print(f"\n🚗 Browser sessions: {self.stats['started']} started ({self.stats['cold_starts']} cold starts without a spare), "
+              f"{self.stats['recycled']} recycled ({self.stats['memory_recycled']} for memory), "
+              f"{self.stats['unhealthy']} unhealthy, {self.stats['stray_tabs']} stray tabs closed")
+
+    def close(self):
+        """Quit all idle and spare sessions. Leased sessions are quit when they come back."""
+        with self.lock:
+            self.closed = True
+        for pool in (self.idle, self.ready):
+            while True:
+                try:
+                    managed = pool.get_nowait()
+                except queue.Empty:
+                    break
+                _call_with_timeout(managed.driver.quit, self.health_timeout)
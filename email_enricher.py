@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import os
+import re
+import threading
+import time
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+from contact_parser import parse_contacts
+from http_cache import DEFAULT_CACHE_DIR, ResponseCache, url_key
+from lead_store import LEADS_FILE, NO_EMAIL_FILE, LeadStore, read_leads
+from remove_duplicates import write_leads
+from result_parser import is_chrome_link
+
+# Enrichment stage for the leads without an email. extract_email_address only sees the mailto:
+# links of the CBR panel, but most schools list an email on their own website. This crawls the
+# website of every no-email lead: the homepage first, then the contact pages it links to, and
+# when it links to none the usual contact paths. Leads that get an email are promoted into the
+# main lead file (or upserted into the lead database) and dropped from the no-email file.
+#
+# The crawl runs on asyncio with one aiohttp connection pool: thousands of sites are fetched
+# concurrently while every host gets at most per_host requests at a time and a pause of delay
+# seconds between them. Several leads with the same website are crawled once.
+CONTACT_PATHS = ["/contact", "/contact/", "/contact.html"]
+CONTACT_LINK = re.compile(r"""href\s*=\s*["']([^"'#]*(?:contact|kontakt)[^"'#]*)["']""", re.IGNORECASE)
+# Things in page source that look like an email address but aren't one (logo@2x.png, ...)
+NOT_AN_EMAIL = re.compile(r"\.(?:png|jpe?g|gif|svg|webp|css|js)$|@(?:example|sentry|domain)\.", re.IGNORECASE)
+MAX_PAGE_BYTES = 512 * 1024
+USER_AGENT = "Mozilla/5.0 (RijschoolDataScraper)"
+
+
+def site_root(website):
+    """The homepage URL of a lead's website, or None when it isn't a real school website."""
+    website = (website or "").strip()
+    if not website or is_chrome_link(website):
+        return None
+    url = urlparse(website if "://" in website else "http://" + website)
+    if url.scheme not in ("http", "https") or not url.hostname or "." not in url.hostname:
+        return None
+    return f"{url.scheme}://{url.netloc}/"
+
+
+def pick_email(emails, host):
+    """The most likely contact address: one on the site's own domain if there is one, else the first."""
+    emails = [email for email in emails if not NOT_AN_EMAIL.search(email)]
+    domain = (host or "").lower().removeprefix("www.")
+    for email in emails:
+        if domain and email.endswith("@" + domain):
+            return email
+    return emails[0] if emails else None
+
+
+def contact_links(html, page_url, limit):
+    """Up to limit links to contact pages on the same host as page_url."""
+    host = urlparse(page_url).netloc
+    links = []
+    for href in CONTACT_LINK.findall(html):
+        url = urljoin(page_url, href.strip())
+        if urlparse(url).netloc == host and url not in links:
+            links.append(url)
+    return links[:limit]
+
+
+class HostLimiter:
+    """At most per_host requests at a time per host, and delay seconds between the start of two of them."""
+
+    def __init__(self, per_host=2, delay=0.0):
+        self.per_host = per_host
+        self.delay = delay
+        self.semaphores = {}
+        self.next_start = {}
+
+    async def __call__(self, host, fetch):
+        semaphore = self.semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with semaphore:
+            if self.delay:
+                now = time.monotonic()
+                start = max(now, self.next_start.get(host, now))
+                self.next_start[host] = start + self.delay
+                if start > now:
+                    await asyncio.sleep(start - now)
+            return await fetch()
+
+
+class EmailEnricher:
+    """Crawls school websites for an email address. Use enrich() from synchronous code."""
+
+    def __init__(self, concurrency=200, per_host=2, delay=0.0, timeout=10, max_pages=4, cache=None):
+        self.concurrency = concurrency
+        self.cache = cache
+        self.per_host = per_host
+        self.limiter = HostLimiter(per_host, delay)
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.stats = {"sites": 0, "found": 0, "pages": 0, "errors": 0, "bytes": 0}
+
+    async def fetch_page(self, session, url):
+        """The HTML of url, or None when it can't be fetched or isn't HTML. Goes through the cache if there is one."""
+        key = url_key("GET", url, "text/html")
+        cached = self.cache.lookup(key) if self.cache else None
+        if cached and cached.fresh:
+            self.cache.hit(cached)
+            return cached.body.decode("utf-8", errors="replace")
+
+        async def fetch():
+            async with session.get(url, allow_redirects=True, headers=cached.validators() if cached else None) as response:
+                if cached and response.status == 304:
+                    self.cache.revalidated(key, cached)
+                    return cached.body
+                if cached:
+                    self.cache.miss()
+                if response.status != 200 or "html" not in response.headers.get("Content-Type", "html"):
+                    return None
+                body = bytearray()
+                complete = True
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    body += chunk
+                    if len(body) > MAX_PAGE_BYTES:
+                        # Look at the first MAX_PAGE_BYTES, but don't cache a cut-off page
+                        complete = False
+                        del body[MAX_PAGE_BYTES:]
+                        break
+                body = bytes(body)
+                self.stats["bytes"] += len(body)
+                if self.cache and complete:
+                    self.cache.store(key, url, response.status, response.headers, body)
+                return body
+
+        self.stats["pages"] += 1
+        try:
+            body = await self.limiter(urlparse(url).netloc, fetch)
+            return body.decode("utf-8", errors="replace") if body is not None else None
+        except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeError, LookupError):
+            self.stats["errors"] += 1
+            return None
+
+    async def find_email(self, session, root):
+        """Look for an email on the homepage, then on its contact pages (or the usual contact paths)."""
+        host = urlparse(root).hostname
+        html = await self.fetch_page(session, root)
+        if html is None:
+            return None
+        email = pick_email(parse_contacts(html).emails, host)
+        if email:
+            return email
+
+        pages = contact_links(html, root, self.max_pages - 1) or [urljoin(root, path) for path in CONTACT_PATHS]
+        for url in pages[:self.max_pages - 1]:
+            html = await self.fetch_page(session, url)
+            if html is None:
+                continue
+            email = pick_email(parse_contacts(html).emails, host)
+            if email:
+                return email
+        return None
+
+    async def crawl(self, roots):
+        """Find an email for every homepage in roots. Returns {root: email or None}."""
+        found = {}
+        queue = asyncio.Queue()
+        for root in roots:
+            queue.put_nowait(root)
+
+        async def worker(session):
+            while True:
+                try:
+                    root = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                found[root] = await self.find_email(session, root)
+                self.stats["sites"] += 1
+                if found[root]:
+                    self.stats["found"] += 1
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={"User-Agent": USER_AGENT, "Accept": "text/html"}) as session:
+            await asyncio.gather(*(worker(session) for _ in range(min(self.concurrency, len(roots)) or 1)))
+        return found
+
+    def enrich(self, leads):
+        """Crawl the websites of leads without an email. Returns the leads that got one, with the email filled in."""
+        leads_per_root = {}
+        for lead in leads:
+            root = site_root(lead.website)
+            if lead.email is None and root:
+                leads_per_root.setdefault(root, []).append(lead)
+
+        found = asyncio.run(self.crawl(list(leads_per_root)))
+        promoted = []
+        for root, email in found.items():
+            if email:
+                for lead in leads_per_root[root]:
+                    lead.email = email
+                    promoted.append(lead)
+        return promoted
+
+
+def promote(promoted, output_dir=".", output_format="csv", db_path=None):
+    """Move the promoted leads into the main lead file and out of the no-email file (or upsert them into the db)."""
+    if db_path:
+        from lead_db import LeadDB
+        db = LeadDB(db_path)
+        for lead in promoted:
+            db.add(lead)
+        db.close()
+        return
+
+    store = LeadStore(output_dir, output_format)
+    for lead in promoted:
+        store.add(lead)
+    store.close()
+
+    promoted_keys = {(lead.rid, lead.name, lead.website) for lead in promoted}
+    remaining = [lead for lead in read_leads(store.no_email_path)
+                 if (lead.rid, lead.name, lead.website) not in promoted_keys]
+    temp_path = store.no_email_path + ".tmp" + os.path.splitext(store.no_email_path)[1]
+    write_leads(remaining, temp_path)
+    os.replace(temp_path, store.no_email_path)
+
+
+def run_mock_check(sites=1000, concurrency=200, per_host=2, delay=0.0, latency=0.0):
+    """Enrich leads for the mock websites and compare the emails with what the mock sites serve."""
+    import mock_websites
+
+    server = mock_websites.create_server(0, latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    try:
+        enricher = EmailEnricher(concurrency, per_host, delay)
+        start_time = time.time()
+        promoted = enricher.enrich(mock_websites.mock_leads(sites, port))
+        elapsed = time.time() - start_time
+    finally:
+        server.shutdown()
+
+    expected = {f"mock{index}": mock_websites.site_email(index) for index in range(sites)}
+    found = {lead.rid: lead.email for lead in promoted}
+    wrong = [(rid, email, found.get(rid)) for rid, email in expected.items() if found.get(rid) != email]
+    for rid, email, got in wrong[:20]:
+        print(f"✗ {rid}: expected {email}, found {got}")
+    print(f"{'✓' if not wrong else '✗'} {len(wrong)} wrong of {sites} mock sites; {enricher.stats}")
+    print(f"   {sites} sites in {elapsed:.2f}s: {sites / elapsed * 60:.0f} sites per minute "
+          f"(most requests to one site: {max(mock_websites.MockSiteHandler.requests_per_host.values())})")
+    return not wrong
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find emails for the no-email leads on the schools' own websites.")
+    parser.add_argument("--output-dir", default=".", help="Directory with the lead files (default: current directory)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="Lead file format (default: csv)")
+    parser.add_argument("--db", metavar="PATH", help="Enrich the no-email leads of this SQLite lead database instead")
+    parser.add_argument("--concurrency", type=int, default=200, help="Sites crawled at the same time (default: 200)")
+    parser.add_argument("--per-host", type=int, default=2, help="Concurrent requests per host (default: 2)")
+    parser.add_argument("--delay", type=float, default=0.5, help="Seconds between two requests to one host (default: 0.5)")
+    parser.add_argument("--timeout", type=float, default=10, help="Seconds per request (default: 10)")
+    parser.add_argument("--max-pages", type=int, default=4, help="Pages fetched per site at most (default: 4)")
+    parser.add_argument("--http-cache", default=DEFAULT_CACHE_DIR, metavar="DIR",
+                        help=f"Response cache for the website pages, next to the lead files (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-http-cache", action="store_true", help="Fetch every page again, without the response cache")
+    parser.add_argument("--cache-ttl", type=float, default=12,
+                        help="Hours a cached page is used without asking the site again (default: 12)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what was found, don't change the lead files")
+    parser.add_argument("--mock", type=int, metavar="SITES",
+                        help="Check the enricher against SITES local mock websites (see mock_websites.py)")
+    args = parser.parse_args()
+
+    if args.mock:
+        raise SystemExit(0 if run_mock_check(args.mock, args.concurrency, args.per_host, args.delay) else 1)
+
+    if args.db:
+        from lead_db import LeadDB
+        db = LeadDB(args.db)
+        leads = list(db.existing_leads(with_email=False))
+        db.close()
+    else:
+        extension = ".jsonl" if args.format == "jsonl" else ".csv"
+        leads = list(read_leads(os.path.join(args.output_dir, NO_EMAIL_FILE + extension)))
+
+    cache = None
+    if not args.no_http_cache:
+        cache = ResponseCache(os.path.join(args.output_dir, args.http_cache), args.cache_ttl * 3600)
+    enricher = EmailEnricher(args.concurrency, args.per_host, args.delay, args.timeout, args.max_pages, cache)
+    start_time = time.time()
+    promoted = enricher.enrich(leads)
+    if cache is not None:
+        cache.print_stats()
+        cache.close()
+    print(f"Crawled {enricher.stats['sites']} websites of {len(leads)} no-email leads in "
+          f"{time.time() - start_time:.1f}s: {len(promoted)} leads got an email ({enricher.stats})")
+    for lead in promoted:
+        print(f"  ✓ {lead.name}: {lead.email}")
+    if promoted and not args.dry_run:
+        promote(promoted, args.output_dir, args.format, args.db)
+        print(f"Promoted {len(promoted)} leads to {args.db or LEADS_FILE}")
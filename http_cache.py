@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# On-disk HTTP response cache for the fetches that don't go through Selenium: the http engine's
+# search and detail requests and the website crawl of email_enricher.py.
+#
+# Bodies are content addressed: every body is stored once under the blake2b hash of its bytes
+# (bodies/ab/abcd...), so the same page served under several URLs takes the space only once. A
+# SQLite index maps each URL to its body, status, headers, validators and expiry time.
+#   - A response younger than its TTL is served from disk without a request.
+#   - An older one is revalidated with If-None-Match/If-Modified-Since when it has an ETag or a
+#     Last-Modified header; a 304 keeps the stored body and starts a new TTL.
+#   - When the bodies take more than max_bytes, the least recently used URLs are evicted and the
+#     bodies nobody refers to anymore are deleted.
+# Responses with Cache-Control no-store, and anything but a 200, are never stored.
+DEFAULT_CACHE_DIR = "http_cache"
+DEFAULT_TTL = 12 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url_key TEXT PRIMARY KEY,
+    url TEXT,
+    status INTEGER,
+    headers TEXT,
+    body_hash TEXT,
+    size INTEGER,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL,
+    max_age INTEGER,
+    last_used REAL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used);
+CREATE INDEX IF NOT EXISTS responses_body_hash ON responses(body_hash);
+"""
+
+
+def url_key(method, url, vary=""):
+    """Index key of a request: the method, the full URL with its query string and e.g. the Accept header."""
+    return hashlib.blake2b(f"{method} {url} {vary}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _max_age(headers):
+    """The max-age of a Cache-Control header in seconds, or None."""
+    for directive in (headers.get("Cache-Control") or "").lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        if name == "max-age" and value.isdigit():
+            return int(value)
+    return None
+
+
+class CachedResponse:
+    """A stored response: status, the kept headers, the body and whether it is still fresh."""
+
+    def __init__(self, status, headers, body, fresh, etag=None, last_modified=None):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.fresh = fresh
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def validators(self):
+        """Headers for a conditional request that revalidates this response."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Content-addressed response cache in directory, with a TTL and LRU eviction above max_bytes.
+
+    Safe to use from several threads. The statistics count fresh hits, revalidations (304),
+    misses, stored responses, evictions and the body bytes that didn't have to be downloaded.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0, "bytes_saved": 0}
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.join(directory, "bodies"), exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(directory, "index.sqlite"), timeout=30,
+                                          isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.total_bytes = self._body_bytes()
+        if self.total_bytes > self.max_bytes:
+            with self.lock:
+                self._evict()
+
+    def _body_bytes(self):
+        row = self.connection.execute(
+            "SELECT SUM(size) FROM (SELECT body_hash, MAX(size) AS size FROM responses GROUP BY body_hash)").fetchone()
+        return row[0] or 0
+
+    def _body_path(self, body_hash):
+        return os.path.join(self.directory, "bodies", body_hash[:2], body_hash)
+
+    def _read_body(self, body_hash):
+        try:
+            with open(self._body_path(body_hash), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def lookup(self, key):
+        """The stored response for a url_key (fresh or not), or None. Counts a miss when there is none."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT status, headers, body_hash, etag, last_modified, stored_at, max_age FROM responses "
+                "WHERE url_key = ?",
+                (key,)).fetchone()
+            body = self._read_body(row[2]) if row else None
+            if body is None:
+                self.stats["misses"] += 1
+                return None
+            self.connection.execute("UPDATE responses SET last_used = ? WHERE url_key = ?", (time.time(), key))
+        status, headers, _, etag, last_modified, stored_at, max_age = row
+        # The TTL of this run counts, so a shorter --cache-ttl also applies to what earlier runs stored
+        ttl = self.ttl if max_age is None else min(self.ttl, max_age)
+        return CachedResponse(status, json.loads(headers), body, time.time() < stored_at + ttl, etag, last_modified)
+
+    def hit(self, cached):
+        """Count a response served from the cache without any request."""
+        with self.lock:
+            self.stats["hits"] += 1
+            self.stats["bytes_saved"] += len(cached.body)
+
+    def miss(self):
+        """Count a stored response that had to be downloaded again (stale without validators, or changed)."""
+        with self.lock:
+            self.stats["misses"] += 1
+
+    def revalidated(self, key, cached):
+        """The server answered 304 to a conditional request: keep the body and start a new TTL."""
+        with self.lock:
+            self.connection.execute("UPDATE responses SET stored_at = ?, last_used = ? WHERE url_key = ?",
+                                    (time.time(), time.time(), key))
+            self.stats["revalidated"] += 1
+            self.stats["bytes_saved"] += len(cached.body)
+
+    def store(self, key, url, status, headers, body):
+        """Store a downloaded response. Only 200s without Cache-Control no-store are kept."""
+        if status != 200 or "no-store" in (headers.get("Cache-Control") or "").lower():
+            return
+        kept = {name: headers[name] for name in KEPT_HEADERS if headers.get(name)}
+        body_hash = hashlib.blake2b(body, digest_size=20).hexdigest()
+        body_path = self._body_path(body_hash)
+        with self.lock:
+            if not os.path.exists(body_path):
+                os.makedirs(os.path.dirname(body_path), exist_ok=True)
+                temp_path = f"{body_path}.{threading.get_ident()}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(body)
+                os.replace(temp_path, body_path)
+                self.total_bytes += len(body)
+            old = self.connection.execute("SELECT body_hash FROM responses WHERE url_key = ?", (key,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status, json.dumps(kept), body_hash, len(body), headers.get("ETag"),
+                 headers.get("Last-Modified"), time.time(), _max_age(headers), time.time()))
+            if old and old[0] != body_hash:
+                self._drop_body_if_unused(old[0])
+            self.stats["stored"] += 1
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _drop_body_if_unused(self, body_hash):
+        if self.connection.execute("SELECT 1 FROM responses WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone():
+            return
+        try:
+            self.total_bytes -= os.path.getsize(self._body_path(body_hash))
+            os.remove(self._body_path(body_hash))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Drop the least recently used URLs until the bodies fit in max_bytes again (lock held)."""
+        while self.total_bytes > self.max_bytes:
+            rows = self.connection.execute(
+                "SELECT url_key, body_hash FROM responses ORDER BY last_used LIMIT 100").fetchall()
+            if not rows:
+                break
+            for key, body_hash in rows:
+                self.connection.execute("DELETE FROM responses WHERE url_key = ?", (key,))
+                self.stats["evicted"] += 1
+                self._drop_body_if_unused(body_hash)
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def print_stats(self):
+        stats = self.stats
+        print(f"\n🗄️ HTTP cache {self.directory}: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+              f"{stats['misses']} misses, {stats['stored']} stored, {stats['evicted']} evicted; "
+              f"{stats['bytes_saved'] / 1024:.1f} KB not downloaded, {self.total_bytes / 1024:.1f} KB on disk")
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class CachingAdapter(HTTPAdapter):
+    """requests transport adapter that answers GET requests from a ResponseCache where it can."""
+
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        key = url_key(request.method, request.url, request.headers.get("Accept", ""))
+        cached = self.cache.lookup(key)
+        if cached and cached.fresh:
+            self.cache.hit(cached)
+            return self._cached_response(request, cached)
+        if cached:
+            request.headers.update(cached.validators())
+
+        response = super().send(request, **kwargs)
+        if cached and response.status_code == 304:
+            self.cache.revalidated(key, cached)
+            return self._cached_response(request, cached)
+        if cached:
+            self.cache.miss()
+        self.cache.store(key, request.url, response.status_code, response.headers, response.content)
+        return response
+
+    def _cached_response(self, request, cached):
+        response = Response()
+        response.status_code = cached.status
+        response.headers = CaseInsensitiveDict(cached.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = cached.body
+        response.url = request.url
+        response.request = request
+        response.reason = "OK (cached)"
+        response.connection = self
+        return response
+
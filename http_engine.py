@@ -0,0 +1,204 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from contextlib import nullcontext
+
+import metrics
+from metrics import count, profiled, span
+from progress_journal import COMPLETED, FAILED, NO_RESULTS, SKIPPED, STOPPED_EARLY
+from lead_store import Lead
+from contact_parser import clean_phone
+from result_parser import is_chrome_link
+from http_cache import CachingAdapter
+
+# Direct HTTP engine: instead of clicking through the rijschoolzoeker with Selenium, fetch the
+# JSON the page itself loads. The search endpoint returns the data-rid rows for a place and the
+# detail endpoint the contact details that the page shows when a row is expanded.
+#
+# EXPERIMENTAL: the endpoints below are a guess at what the page loads, and fixtures/cbr was
+# written to match them, not recorded from cbr.nl. Until they are confirmed from a browser capture
+# of the live site (capture.py), datascraper.py only runs this engine with --experimental-http-engine.
+API_PATH = "/api/rijschoolzoeker"
+SEARCH_ENDPOINT = API_PATH + "/zoeken"
+DETAIL_ENDPOINT = API_PATH + "/rijscholen/{rid}"
+REQUEST_TIMEOUT = 10
+
+
+def api_base(rijschoolzoeker_url):
+    """Base URL of the rijschoolzoeker API for the given rijschoolzoeker page URL."""
+    url = urlparse(rijschoolzoeker_url)
+    return f"{url.scheme}://{url.netloc}"
+
+
+def create_session(pool_size=10, cache=None):
+    """Create a requests session with a connection pool big enough for pool_size concurrent requests.
+    With a cache (http_cache.ResponseCache) GET responses are served from and stored in it."""
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    if cache is not None:
+        adapter = CachingAdapter(cache, pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept": "application/json", "User-Agent": "Mozilla/5.0 (RijschoolDataScraper)"})
+    return session
+
+
+def fetch_search_results(session, base_url, place_name):
+    """Fetch the result rows (rid, naam, plaats) for a place, sorted alphabetically like the Selenium path."""
+    response = session.get(
+        base_url + SEARCH_ENDPOINT,
+        params={"plaats": place_name, "voertuig": "auto", "sortering": "alfabetisch"},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json().get("rijscholen", [])
+
+
+def fetch_school_details(session, base_url, rid):
+    """Fetch the contact details of a single driving school by its data-rid."""
+    response = session.get(base_url + DETAIL_ENDPOINT.format(rid=rid), timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+def details_to_lead(details, place_name, rid):
+    """Turn a detail payload into a Lead, with the same fields the Selenium path extracts."""
+    return Lead(
+        name=(details.get("naam") or "").strip().replace(',', '') or None,
+        phone=clean_phone(details.get("telefoon")),
+        email=(details.get("email") or "").strip() or None,
+        website=None if is_chrome_link(details.get("website")) else (details.get("website") or "").strip() or None,
+        place=place_name,
+        rid=rid,
+        scraped_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    )
+
+
+def scrape_place_http(session, base_url, place_name, executor, seen_rids=None, yield_model=None, refresh_index=None,
+                      journal=None):
+    """Fetch all driving schools for a place over HTTP. Returns a list of Leads, or None when the place has none.
+    Schools that are done in the journal, whose rid is in seen_rids, or whose row didn't change when
+    refreshing, are skipped without fetching their details."""
+    with span("search"):
+        results = fetch_search_results(session, base_url, place_name)
+    print(f"    ✓ Found {len(results)} search results for {place_name}")
+    count("results", len(results))
+    if yield_model:
+        yield_model.count_results(place_name, len(results))
+    if not results:
+        return None
+
+    if journal:
+        done = [result for result in results if journal.is_result_done(place_name, result["rid"])]
+        if done:
+            print(f"  ⏭️ {len(done)} results for {place_name} already done in a previous run")
+            results = [result for result in results if not journal.is_result_done(place_name, result["rid"])]
+
+    def skip(rid):
+        if journal:
+            journal.record_result(place_name, rid, SKIPPED)
+
+    if refresh_index is not None:
+        rows = {result["rid"]: " ".join(str(result.get(key) or "") for key in ("naam", "plaats", "slagingspercentage"))
+                for result in results}
+        changed_rids = refresh_index.compare(place_name, rows)
+        print(f"  🔄 {len(changed_rids)} of {len(results)} results are new or changed for {place_name}")
+        for result in results:
+            if result["rid"] not in changed_rids:
+                skip(result["rid"])
+        results = [result for result in results if result["rid"] in changed_rids]
+    elif seen_rids is not None:
+        new_results = [result for result in results if result["rid"] not in seen_rids]
+        for result in results:
+            if result["rid"] in seen_rids:
+                skip(result["rid"])
+        skipped_known = len(results) - len(new_results)
+        seen_rids.count_skipped(skipped_known)
+        print(f"  ⏭️ Skipped {skipped_known} already known schools for {place_name}")
+        results = new_results
+
+    def fetch_lead(result):
+        try:
+            with span("detail_fetch"):
+                details = fetch_school_details(session, base_url, result["rid"])
+            return details_to_lead(details, place_name, result["rid"])
+        except Exception as e:
+            print(f"      ✗ Error fetching rijschool {result.get('rid')}: {str(e)}")
+            count("result_failures")
+            if journal:
+                journal.record_result(place_name, result["rid"], FAILED)
+            return None
+
+    return [lead for lead in executor.map(fetch_lead, results) if lead]
+
+
+def lead_written(place_name, rid, seen_rids=None, refresh_index=None, journal=None):
+    """A fetched school's lead is on disk: journal its result, write its rid and confirm its row hash."""
+    if journal:
+        journal.record_result(place_name, rid, COMPLETED)
+    if seen_rids is not None:
+        seen_rids.write(rid)
+    if refresh_index is not None:
+        refresh_index.confirm(place_name, rid)
+
+
+def run_http_engine(places, rijschoolzoeker_url, save_entry, when_written, num_workers=4, journal=None, seen_rids=None,
+                    yield_model=None, refresh_index=None, profile_place=None, profile_file=None, cache=None):
+    """Process all places over HTTP, fetching the details of each place's schools num_workers at a time.
+    A fetched rid is claimed in seen_rids right away. Completed results, the seen rids file and completed
+    places are only recorded through when_written(action) (the lead store's), so they never get ahead of the
+    leads on disk; on --resume the results done in the journal are not fetched again.
+    With a yield_model the run stops early once the recent places hardly give new leads; with a cache
+    (http_cache.ResponseCache) responses of earlier runs are reused or revalidated."""
+    base_url = api_base(rijschoolzoeker_url)
+    session = create_session(pool_size=num_workers, cache=cache)
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for i, place in enumerate(places):
+            if yield_model and yield_model.should_stop():
+                print(f"⏹️ The last places gave only {yield_model.marginal_yield():.2f} new leads per place, stopping early")
+                if journal:
+                    for stopped in places[i:]:
+                        journal.record_place(stopped, STOPPED_EARLY)
+                break
+            print(f"\n--- Processing place {i+1}/{len(places)}: {place} ---")
+            start_time = time.time()
+            if yield_model:
+                yield_model.start_visit(place)
+            count("places")
+            try:
+                with (profiled(profile_file) if place == profile_place else nullcontext()), span("place"):
+                    leads = scrape_place_http(session, base_url, place, executor, seen_rids, yield_model, refresh_index,
+                                              journal)
+                    for lead in leads or []:
+                        save_entry(lead)
+                        if seen_rids is not None:
+                            # Known right away, so the next places skip it before its lead is written
+                            seen_rids.claim(lead.rid)
+                        when_written(lambda place=place, rid=lead.rid: lead_written(place, rid, seen_rids, refresh_index,
+                                                                                    journal))
+            except Exception as e:
+                print(f"Error processing place '{place}': {str(e)}")
+                count("place_failures")
+                if journal:
+                    journal.record_place(place, FAILED)
+                metrics.export()
+                continue
+
+            if journal:
+                status = COMPLETED if leads is not None else NO_RESULTS
+                when_written(lambda place=place, status=status: journal.record_place(place, status))
+            if yield_model:
+                yield_model.finish_visit(place)
+            metrics.export()
+            print(f"  ✓ Finished {len(leads or [])} results for {place} in {time.time() - start_time:.2f}s")
+
+    session.close()
@@ -0,0 +1,215 @@
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+
+from lead_store import (Lead, CSV_HEADER, LEADS_FILE, NO_EMAIL_FILE, read_leads,
+                        normalize_email, normalize_phone, normalize_name)
+
+# SQLite lead database. A lead is unique by its data-rid and by its normalized email; saving a lead
+# that matches an existing one fills in the fields the existing row is missing instead of adding a
+# duplicate. Different schools can share a phone number (a franchise or booking line), so the
+# phone only merges a lead into an existing row whose rid, email and name don't contradict it. The
+# database runs in WAL mode, so several scraper processes can write to the same file.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    phone TEXT,
+    email TEXT,
+    website TEXT,
+    place TEXT,
+    rid TEXT,
+    scraped_at TEXT,
+    name_key TEXT,
+    email_key TEXT,
+    phone_key TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS leads_rid ON leads(rid) WHERE rid IS NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS leads_email_key ON leads(email_key) WHERE email_key IS NOT NULL;
+DROP INDEX IF EXISTS leads_phone_key;
+CREATE INDEX IF NOT EXISTS leads_phone ON leads(phone_key) WHERE phone_key IS NOT NULL;
+CREATE INDEX IF NOT EXISTS leads_name_key ON leads(name_key);
+"""
+
+COLUMNS = ("name", "phone", "email", "website", "place", "rid", "scraped_at", "name_key", "email_key", "phone_key")
+INSERT = f"INSERT INTO leads ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})"
+# A phone match must not contradict the lead: every rid, email and name key is either missing on one side or equal
+PHONE_MATCH = f"""
+SELECT id, {', '.join(COLUMNS)} FROM leads WHERE phone_key = ?
+AND (rid IS NULL OR ? IS NULL OR rid = ?)
+AND (email_key IS NULL OR ? IS NULL OR email_key = ?)
+AND (name_key IS NULL OR ? IS NULL OR name_key = ?)
+ORDER BY id LIMIT 1
+"""
+LEAD_COLUMNS = "name, phone, email, website, place, rid, scraped_at"
+
+
+class LeadDB:
+    """Lead store backed by SQLite, with the same add/flush/close interface as lead_store.LeadStore.
+
+    Leads are buffered and saved batch_size at a time in a single transaction.
+    """
+
+    def __init__(self, path, batch_size=50):
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self.inserted = 0
+        self.merged = 0
+        # Merges that left a rid or email on the other lead it already belonged to
+        self.conflicts = 0
+        self.after_flush = []
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def add(self, lead):
+        with self.lock:
+            self.pending.append(lead)
+            if len(self.pending) >= self.batch_size:
+                self._flush()
+
+    def _match(self, values):
+        """The existing row (id, columns...) a lead's values belong to: by rid, by email, then by a non-conflicting phone."""
+        for column in ("rid", "email_key"):
+            value = values[column]
+            if value is not None:
+                row = self.connection.execute(
+                    f"SELECT id, {', '.join(COLUMNS)} FROM leads WHERE {column} = ?", (value,)).fetchone()
+                if row:
+                    return row
+        if values["phone_key"] is None:
+            return None
+        return self.connection.execute(PHONE_MATCH, (
+            values["phone_key"], values["rid"], values["rid"], values["email_key"], values["email_key"],
+            values["name_key"], values["name_key"])).fetchone()
+
+    def _owned_by_other(self, column, value, row_id):
+        return self.connection.execute(
+            f"SELECT 1 FROM leads WHERE {column} = ? AND id != ?", (value, row_id)).fetchone() is not None
+
+    def _save(self, lead):
+        values = dict(zip(COLUMNS, (
+            lead.name, lead.phone, lead.email, lead.website, lead.place, lead.rid, lead.scraped_at,
+            normalize_name(lead.name), normalize_email(lead.email), normalize_phone(lead.phone))))
+        row = self._match(values)
+        if row is None:
+            self.connection.execute(INSERT, tuple(values.values()))
+            self.inserted += 1
+            return
+
+        row_id, existing = row[0], dict(zip(COLUMNS, row[1:]))
+        merged = {column: existing[column] if existing[column] is not None else value
+                  for column, value in values.items()}
+        merged["scraped_at"] = values["scraped_at"] or existing["scraped_at"]
+        # A rid or email that already belongs to another lead stays there (e.g. matched by rid, email on another row)
+        for column, paired in (("rid", None), ("email_key", "email")):
+            if existing[column] is None and merged[column] is not None and \
+                    self._owned_by_other(column, merged[column], row_id):
+                merged[column] = None
+                if paired:
+                    merged[paired] = existing[paired]
+                self.conflicts += 1
+        self.connection.execute(
+            f"UPDATE leads SET {', '.join(f'{column} = ?' for column in COLUMNS)} WHERE id = ?",
+            tuple(merged.values()) + (row_id,))
+        self.merged += 1
+
+    def when_written(self, action):
+        """Call action() once every lead added so far is committed: right away, or after the next flush."""
+        with self.lock:
+            if self.pending:
+                self.after_flush.append(action)
+                return
+        action()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for lead in self.pending:
+                self._save(lead)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        self.pending = []
+        actions, self.after_flush = self.after_flush, []
+        for action in actions:
+            action()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            self.connection.close()
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    def existing_leads(self, with_email=None):
+        """Yield all leads in the database, optionally only those with (True) or without (False) an email."""
+        self.flush()
+        query = f"SELECT {LEAD_COLUMNS} FROM leads"
+        if with_email is True:
+            query += " WHERE email IS NOT NULL"
+        elif with_email is False:
+            query += " WHERE email IS NULL"
+        for row in self.connection.execute(query + " ORDER BY name COLLATE NOCASE"):
+            yield Lead(*row)
+
+
+def export_csv(db, output_dir="."):
+    """Write rijscholen_leads.csv and leads_no_email.csv from the database in the lead_store CSV layout."""
+    os.makedirs(output_dir, exist_ok=True)
+    for file_name, with_email in ((LEADS_FILE, True), (NO_EMAIL_FILE, False)):
+        path = os.path.join(output_dir, file_name + ".csv")
+        count = 0
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            for lead in db.existing_leads(with_email):
+                writer.writerow(lead.to_row())
+                count += 1
+        print(f"✓ Exported {count} leads to {path}")
+
+
+def import_files(db, paths):
+    """Upsert the leads of existing CSV or JSON Lines lead files into the database."""
+    for path in paths:
+        before = db.inserted
+        for lead in read_leads(path):
+            db.add(lead)
+        db.flush()
+        print(f"✓ Imported {path}: {db.inserted - before} new leads")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import leads into and export leads from the SQLite lead database.")
+    parser.add_argument("database", help="SQLite database file, e.g. leads.sqlite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write rijscholen_leads.csv and leads_no_email.csv")
+    export_parser.add_argument("--output-dir", default=".")
+    import_parser = commands.add_parser("import", help="Load existing lead files into the database")
+    import_parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    db = LeadDB(args.database)
+    if args.command == "export":
+        export_csv(db, args.output_dir)
+    else:
+        import_files(db, args.paths)
+        print(f"{len(db)} leads in {args.database} ({db.merged} merged into existing leads, "
+              f"{db.conflicts} with a rid or email that stayed on another lead)")
+    db.close()
@@ -0,0 +1,207 @@
+from dataclasses import dataclass, asdict, fields
+from datetime import datetime, timezone
+from typing import Optional
+import csv
+import json
+import os
+import re
+import threading
+
+LEADS_FILE = "rijscholen_leads"
+NO_EMAIL_FILE = "leads_no_email"
+CSV_HEADER = ["RijschoolNaam", "Telefoonnummer", "Email", "Website", "Plaats", "Rid", "GescraptOp"]
+
+
+@dataclass
+class Lead:
+    """One driving school lead, as written to the lead files."""
+    name: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    website: Optional[str] = None
+    place: Optional[str] = None
+    rid: Optional[str] = None
+    scraped_at: Optional[str] = None
+
+    @classmethod
+    def from_record(cls, record, place=None, rid=None):
+        """Create a lead from a result_parser.Record, stamped with the current time."""
+        return cls(record.name, record.phone, record.email, record.website, place, rid,
+                   datetime.now(timezone.utc).isoformat(timespec="seconds"))
+
+    def entry_key(self):
+        """The 'school,phone,email,website' string used to recognise leads that were already saved."""
+        return f"{self.name},{self.phone},{self.email},{self.website}"
+
+    def to_row(self):
+        return [getattr(self, field.name) or "" for field in fields(self)]
+
+
+def normalize_email(email):
+    """Dedup key for an email address: trimmed and lowercased."""
+    email = (email or "").strip().lower()
+    if email.startswith("mailto:"):
+        email = email[7:]
+    return email or None
+
+
+def normalize_phone(phone):
+    """Dedup key for a Dutch phone number: only the digits, in national format (0xx...)."""
+    digits = re.sub(r"\D", "", phone or "")
+    if digits.startswith("0031"):
+        digits = "0" + digits[4:]
+    elif digits.startswith("31") and len(digits) == 11:
+        digits = "0" + digits[2:]
+    return digits if len(digits) >= 9 else None
+
+
+def normalize_name(name):
+    """Dedup key for a school name: lowercase words without punctuation."""
+    return " ".join(re.sub(r"[^\w\s]", " ", (name or "").lower()).split()) or None
+
+
+def _value(text):
+    text = (text or "").strip()
+    return None if text in ("", "None") else text
+
+
+def _lead_from_row(row):
+    if len(row) >= 4 and any(cell.strip() for cell in row[1:]):
+        return Lead(*[_value(cell) for cell in row[:len(CSV_HEADER)]])
+
+    # Legacy layout: the whole "school,phone,email,website" entry in the first cell, padded with
+    # empty cells. School names never contain commas (they were stripped), so split from the right.
+    parts = row[0].rsplit(",", 3)
+    parts += [""] * (4 - len(parts))
+    return Lead(*[_value(part) for part in parts])
+
+
+def read_leads(path):
+    """Yield a Lead for every row of a CSV or JSON Lines lead file. Understands the old one-cell CSV rows too."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield Lead(**json.loads(line))
+            return
+
+        reader = csv.reader(f)
+        next(reader, None)  # Skip header row
+        for row in reader:
+            if row and row[0].strip():
+                yield _lead_from_row(row)
+
+
+def migrate_legacy_csv(path):
+    """Rewrite a lead CSV that still has the old header or one-cell rows in the current column layout."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f), None)
+    if header == CSV_HEADER:
+        return False
+
+    leads = list(read_leads(path))
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(lead.to_row() for lead in leads)
+    os.replace(temp_path, path)
+    print(f"Migrated {len(leads)} leads in {path} to the new CSV layout")
+    return True
+
+
+class _LeadWriter:
+    """Keeps one lead file open and writes its leads in batches."""
+
+    def __init__(self, path, output_format):
+        self.path = path
+        self.output_format = output_format
+        self.pending = []
+
+        if output_format == "csv" and os.path.exists(path) and os.path.getsize(path) > 0:
+            migrate_legacy_csv(path)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+
+        self.file = open(path, "a", encoding="utf-8", newline="")
+        if output_format == "csv":
+            self.csv_writer = csv.writer(self.file)
+            if is_new:
+                self.csv_writer.writerow(CSV_HEADER)
+
+    def write(self, lead):
+        self.pending.append(lead)
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.output_format == "csv":
+            self.csv_writer.writerows(lead.to_row() for lead in self.pending)
+        else:
+            self.file.write("".join(json.dumps(asdict(lead), ensure_ascii=False) + "\n" for lead in self.pending))
+        self.pending = []
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class LeadStore:
+    """Writes leads to rijscholen_leads (leads with an email) and leads_no_email, as CSV or JSON Lines.
+
+    Each output keeps a single open file; leads are buffered and written every batch_size leads,
+    and on flush()/close(). Safe to use from several worker threads. Progress that may only be
+    recorded once a lead is on disk (its rid, its journal entry) goes through when_written().
+    """
+
+    def __init__(self, output_dir=".", output_format="csv", batch_size=25):
+        extension = ".jsonl" if output_format == "jsonl" else ".csv"
+        self.leads_path = os.path.join(output_dir, LEADS_FILE + extension)
+        self.no_email_path = os.path.join(output_dir, NO_EMAIL_FILE + extension)
+        self.batch_size = batch_size
+        self.writers = {
+            "leads": _LeadWriter(self.leads_path, output_format),
+            "no_email": _LeadWriter(self.no_email_path, output_format),
+        }
+        self.count = 0
+        self.after_flush = []
+        self.lock = threading.Lock()
+
+    def add(self, lead):
+        with self.lock:
+            self.writers["no_email" if lead.email is None else "leads"].write(lead)
+            self.count += 1
+            if self.count % self.batch_size == 0:
+                self._flush()
+
+    def existing_leads(self):
+        """Yield all leads already in the output files."""
+        with self.lock:
+            self._flush()
+        for path in (self.no_email_path, self.leads_path):
+            yield from read_leads(path)
+
+    def when_written(self, action):
+        """Call action() once every lead added so far is written: right away, or after the next flush."""
+        with self.lock:
+            if any(writer.pending for writer in self.writers.values()):
+                self.after_flush.append(action)
+                return
+        action()
+
+    def _flush(self):
+        for writer in self.writers.values():
+            writer.flush()
+        actions, self.after_flush = self.after_flush, []
+        for action in actions:
+            action()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            for writer in self.writers.values():
+                writer.close()
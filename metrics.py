@@ -0,0 +1,208 @@
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+import cProfile
+import json
+import math
+import os
+import pstats
+import random
+import tempfile
+import threading
+import time
+
+# Wall-clock time per scraper stage (page load, search input, result rows, ...) in seconds, and
+# counters (places, results, new leads, failures). Shared by all worker threads, so every update
+# goes through the lock. Both can be exported as JSON and in the Prometheus text format.
+#
+# A stage keeps running totals and histogram bucket counts, plus a reservoir sample of at most
+# RESERVOIR_SIZE latencies for the percentiles (exact until a stage has that many), so an export
+# costs the same after the first place as after the ten-thousandth.
+RESERVOIR_SIZE = 4096
+# Reported from the start, so they show up as 0 rather than missing
+COUNTER_NAMES = ("places", "place_failures", "results", "result_failures", "new_leads")
+counters = defaultdict(int, {name: 0 for name in COUNTER_NAMES})
+_lock = threading.Lock()
+
+# Upper bounds (seconds) of the Prometheus histogram buckets
+HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROMETHEUS_PREFIX = "rijschool_scraper"
+_export_paths = {"json": None, "prometheus": None}
+_export_lock = threading.Lock()
+
+
+class StageStats:
+    """Count, total, max, histogram bucket counts and a reservoir sample of one stage's latencies."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # Per bucket, not cumulative; the last one is for values above the largest bound
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.sample = []
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect_left(HISTOGRAM_BUCKETS, seconds)] += 1
+        if len(self.sample) < RESERVOIR_SIZE:
+            self.sample.append(seconds)
+        else:
+            index = random.randrange(self.count)
+            if index < RESERVOIR_SIZE:
+                self.sample[index] = seconds
+
+    def cumulative_buckets(self):
+        """Number of values at or below each of HISTOGRAM_BUCKETS."""
+        counts = []
+        running = 0
+        for bucket_count in self.buckets[:-1]:
+            running += bucket_count
+            counts.append(running)
+        return counts
+
+
+stage_stats = defaultdict(StageStats)
+
+
+def observe(stage, seconds):
+    """Record how long one occurrence of a stage took."""
+    with _lock:
+        stage_stats[stage].add(seconds)
+
+
+@contextmanager
+def span(stage):
+    """Time the code in the with block as one occurrence of stage, also when it raises."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start_time)
+
+
+def count(name, amount=1):
+    """Add to one of the counters."""
+    with _lock:
+        counters[name] += amount
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = math.ceil(p / 100 * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+def _summaries(with_buckets=False):
+    with _lock:
+        snapshot = {stage: (stats.count, stats.total, stats.max, sorted(stats.sample),
+                            stats.cumulative_buckets() if with_buckets else None)
+                    for stage, stats in stage_stats.items()}
+    summary = {}
+    for stage, (stage_count, total, maximum, sample, buckets) in snapshot.items():
+        summary[stage] = {
+            "count": stage_count,
+            "total": total,
+            "p50": percentile(sample, 50),
+            "p95": percentile(sample, 95),
+            "max": maximum,
+        }
+        if with_buckets:
+            summary[stage]["buckets"] = dict(zip(map(str, HISTOGRAM_BUCKETS), buckets))
+    return summary
+
+
+def latency_summary():
+    """Return {stage: {count, total, p50, p95, max}} for every stage seen so far.
+    The percentiles come from the stage's reservoir sample once it has more than RESERVOIR_SIZE values."""
+    return _summaries()
+
+
+def print_latency_report():
+    """Print the per-stage latency table, stages that took the most wall-clock time first."""
+    summary = latency_summary()
+    if not summary:
+        return
+
+    print("\n--- Latency per stage (seconds) ---")
+    print(f"{'stage':<20} {'count':>7} {'total':>9} {'p50':>8} {'p95':>8} {'max':>8}")
+    for stage, stats in sorted(summary.items(), key=lambda item: item[1]["total"], reverse=True):
+        print(f"{stage:<20} {stats['count']:>7} {stats['total']:>9.2f} "
+              f"{stats['p50']:>8.3f} {stats['p95']:>8.3f} {stats['max']:>8.3f}")
+
+
+def metrics_snapshot():
+    """All counters, and per stage the latency summary plus the histogram buckets."""
+    with _lock:
+        current_counters = dict(counters)
+    return {"counters": current_counters, "stages": _summaries(with_buckets=True)}
+
+
+def prometheus_text(prefix=PROMETHEUS_PREFIX):
+    """The counters and stage histograms in the Prometheus text exposition format."""
+    snapshot = metrics_snapshot()
+    lines = []
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {value}")
+
+    metric = f"{prefix}_stage_seconds"
+    lines.append(f"# HELP {metric} Wall-clock time per scraper stage.")
+    lines.append(f"# TYPE {metric} histogram")
+    for stage, stats in sorted(snapshot["stages"].items()):
+        for bound, bucket_count in stats["buckets"].items():
+            lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {bucket_count}')
+        lines.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {stats["count"]}')
+        lines.append(f'{metric}_sum{{stage="{stage}"}} {stats["total"]:.6f}')
+        lines.append(f'{metric}_count{{stage="{stage}"}} {stats["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def set_export_paths(json_path=None, prometheus_path=None):
+    """Where export() writes the metrics; None leaves that format out."""
+    _export_paths["json"] = json_path
+    _export_paths["prometheus"] = prometheus_path
+
+
+def _write_atomically(path, text):
+    # A temporary file of its own next to path, so the rename never takes another writer's file
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=os.path.basename(path) + ".")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def export():
+    """Write the current metrics to the paths given to set_export_paths (e.g. after every place).
+    Called from every worker thread; one export at a time, and a failed write only prints a warning."""
+    with _export_lock:
+        try:
+            if _export_paths["json"]:
+                _write_atomically(_export_paths["json"], json.dumps(metrics_snapshot(), indent=1))
+            if _export_paths["prometheus"]:
+                _write_atomically(_export_paths["prometheus"], prometheus_text())
+        except Exception as e:
+            print(f"⚠️ Could not export the metrics: {str(e)}")
+
+
+@contextmanager
+def profiled(path, top=25):
+    """Run the with block under cProfile, save the profile to path and print the top functions."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"\n--- Profile (saved to {path}) ---")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
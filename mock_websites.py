@@ -0,0 +1,152 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import argparse
+import csv
+import random
+import time
+
+from lead_store import CSV_HEADER, Lead
+
+# Local mock of the driving schools' own websites, for email_enricher.py. One server answers for
+# thousands of sites: site n lives on its own loopback address (127.0.a.b, see site_host), so every
+# site is a separate host for the enricher's per-host limits and connection pool. Linux routes all
+# of 127.0.0.0/8 to the loopback interface; on macOS the extra addresses have to be aliased first.
+#
+# What a site looks like depends on n, so the expected email of every site is known:
+#   n % 6 == 0  email in a mailto: link on the homepage
+#   n % 6 == 1  email on /contact, linked from the homepage
+#   n % 6 == 2  email as plain text on /over-ons/contactgegevens, linked from the homepage
+#   n % 6 == 3  email on /contact, which the homepage doesn't link to
+#   n % 6 == 4  no email anywhere (only an image name that looks like one)
+#   n % 6 == 5  the homepage fails with a 500
+SITES_PER_OCTET = 250
+# The pages never change; a conditional request with this date gets a 304
+LAST_MODIFIED = "Mon, 05 Oct 2026 08:00:00 GMT"
+
+
+def site_host(index):
+    """The loopback address of mock site index."""
+    return f"127.0.{index // SITES_PER_OCTET + 1}.{index % SITES_PER_OCTET + 1}"
+
+
+def site_index(host):
+    """The mock site index for a loopback address, or None."""
+    parts = host.split(":")[0].split(".")
+    if len(parts) != 4 or parts[:2] != ["127", "0"]:
+        return None
+    return (int(parts[2]) - 1) * SITES_PER_OCTET + int(parts[3]) - 1
+
+
+def site_email(index):
+    """The email the enricher should find on mock site index, None for the sites without one."""
+    if index % 6 in (4, 5):
+        return None
+    return f"info@rijschool{index}.nl"
+
+
+def _page(title, body):
+    return (f"<!DOCTYPE html><html><head><title>{title}</title></head><body>"
+            f"<nav><a href=\"/\">Home</a> <a href=\"/tarieven\">Tarieven</a></nav>{body}"
+            f"<footer><img src=\"/img/logo@2x.png\" alt=\"\"></footer></body></html>")
+
+
+def site_pages(index):
+    """{path: html} of mock site index."""
+    email = site_email(index)
+    kind = index % 6
+    home = f"<h1>Rijschool {index}</h1><p>Leer autorijden bij Rijschool {index}.</p>"
+    pages = {"/tarieven": _page("Tarieven", "<p>Les van 60 minuten: 55 euro</p>")}
+    if kind == 0:
+        home += f"<p>Mail ons: <a href=\"mailto:{email}\">{email}</a></p>"
+    elif kind == 1:
+        home += "<a href=\"/contact\">Contact</a>"
+        pages["/contact"] = _page("Contact", f"<p>Bel 072 123 45 67 of mail <a href=\"mailto:{email}\">ons</a></p>")
+    elif kind == 2:
+        home += "<a href=\"/over-ons/contactgegevens\">Neem contact op</a>"
+        pages["/over-ons/contactgegevens"] = _page("Contactgegevens", f"<p>E-mail: {email}</p>")
+    elif kind == 3:
+        pages["/contact"] = _page("Contact", f"<p>E-mail: <a href=\"mailto:{email}\">{email}</a></p>")
+    pages["/"] = _page(f"Rijschool {index}", home)
+    return pages
+
+
+class MockSiteHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    jitter = 0.0
+    requests_per_host = {}
+
+    def do_GET(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+        index = site_index(self.headers.get("Host", ""))
+        if index is None:
+            self.send_error(404)
+            return
+        MockSiteHandler.requests_per_host[index] = MockSiteHandler.requests_per_host.get(index, 0) + 1
+        if index % 6 == 5:
+            self.send_error(500)
+            return
+        html = site_pages(index).get(self.path.split("?")[0])
+        if html is None:
+            self.send_error(404)
+            return
+        if self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = html.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockSiteServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def create_server(port=0, latency=0.0, jitter=0.0):
+    """Create (but don't start) the mock site server on all loopback addresses. Port 0 picks a free port."""
+    MockSiteHandler.latency = latency
+    MockSiteHandler.jitter = jitter
+    MockSiteHandler.requests_per_host = {}
+    return MockSiteServer(("0.0.0.0", port), MockSiteHandler)
+
+
+def mock_leads(count, port):
+    """No-email leads for the first count mock sites."""
+    return [Lead(f"Rijschool {index}", None, None, f"http://{site_host(index)}:{port}/", "Mockdorp", f"mock{index}")
+            for index in range(count)]
+
+
+def write_mock_leads(path, count, port):
+    """Write a leads_no_email CSV with the first count mock sites as websites."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(lead.to_row() for lead in mock_leads(count, port))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve mock driving school websites for email_enricher.py.")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--sites", type=int, default=1000, help="Number of mock sites in --leads (default: 1000)")
+    parser.add_argument("--leads", metavar="PATH", help="Write a no-email lead file with the mock sites to PATH")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra random seconds per response")
+    args = parser.parse_args()
+
+    if args.leads:
+        write_mock_leads(args.leads, args.sites, args.port)
+        print(f"Wrote {args.sites} mock leads to {args.leads}")
+    server = create_server(args.port, args.latency, args.jitter)
+    print(f"Mock websites on http://{site_host(0)}:{args.port}/ ... http://{site_host(args.sites - 1)}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping mock websites")
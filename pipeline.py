@@ -0,0 +1,179 @@
+import queue
+import threading
+import time
+
+from lead_store import Lead
+from metrics import observe
+from result_parser import parse_result_html
+
+# Staged scrape pipeline, so the browser never waits for parsing or disk writes:
+#
+#   browser workers --raw_queue--> parser threads --lead_queue--> writer thread
+#
+# The browser workers only snapshot each expanded result's HTML and submit it. Parser threads turn
+# the HTML into Leads and a single writer thread saves them, so all dedup and file writes happen in
+# one place. Both queues are bounded: when the parsers or the writer fall behind, submit() blocks
+# and the time spent blocked is reported as backpressure.
+#
+# A place is only finished once the writer has handled its last result: finish_place() runs the
+# place's completion (journal entry, yield bookkeeping) then, so a crash can't mark a place done
+# while its results are still queued.
+_STOP = object()
+
+
+class _StageQueue:
+    """A bounded queue that keeps track of how full it gets and how long producers wait on it."""
+
+    def __init__(self, name, maxsize):
+        self.name = name
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.max_depth = 0
+        self.blocked_puts = 0
+        self.blocked_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def put(self, item):
+        blocked_seconds = None
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            start_time = time.time()
+            self.queue.put(item)
+            blocked_seconds = time.time() - start_time
+        with self.lock:
+            if blocked_seconds is not None:
+                self.blocked_puts += 1
+                self.blocked_seconds += blocked_seconds
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def get(self):
+        return self.queue.get()
+
+    def stats(self):
+        return {
+            "maxsize": self.queue.maxsize,
+            "max_depth": self.max_depth,
+            "blocked_puts": self.blocked_puts,
+            "blocked_seconds": round(self.blocked_seconds, 3),
+        }
+
+
+class ScrapePipeline:
+    """Parses submitted result HTML on num_parsers threads and saves the leads on one writer thread.
+
+    save_entry(lead) is called for every lead from the writer thread. on_saved(place, rid, ok), if
+    given, is called after each result so progress can be recorded once the lead is actually saved.
+    """
+
+    def __init__(self, save_entry, on_saved=None, num_parsers=2, queue_size=100):
+        self.save_entry = save_entry
+        self.on_saved = on_saved
+        self.raw_queue = _StageQueue("raw", queue_size)
+        self.lead_queue = _StageQueue("leads", queue_size)
+        self.counts = {"submitted": 0, "parsed": 0, "saved": 0, "failed": 0}
+        self.counts_lock = threading.Lock()
+        # Results per place submitted but not yet through the writer, and what to run when a finished place gets to 0
+        self.outstanding = {}
+        self.on_place_done = {}
+        self.closed = False
+
+        self.parsers = [threading.Thread(target=self._parse_loop, name=f"parser-{i+1}", daemon=True)
+                        for i in range(num_parsers)]
+        self.writer = threading.Thread(target=self._write_loop, name="writer", daemon=True)
+        for thread in self.parsers + [self.writer]:
+            thread.start()
+
+    def _count(self, name):
+        with self.counts_lock:
+            self.counts[name] += 1
+
+    def submit(self, place_name, rid, html):
+        """Hand the HTML of an expanded result to the parsers. Blocks while the pipeline is full."""
+        if self.closed:
+            raise RuntimeError("pipeline is closed")
+        self._count("submitted")
+        with self.counts_lock:
+            self.outstanding[place_name] = self.outstanding.get(place_name, 0) + 1
+        self.raw_queue.put((place_name, rid, html))
+
+    def finish_place(self, place_name, on_done):
+        """Call on_done() once every result submitted for place_name went through the writer (now, if none is left)."""
+        with self.counts_lock:
+            if self.outstanding.get(place_name):
+                self.on_place_done[place_name] = on_done
+                return
+        on_done()
+
+    def _result_done(self, place_name):
+        with self.counts_lock:
+            self.outstanding[place_name] -= 1
+            if self.outstanding[place_name]:
+                return
+            del self.outstanding[place_name]
+            on_done = self.on_place_done.pop(place_name, None)
+        if on_done:
+            on_done()
+
+    def _parse_loop(self):
+        while True:
+            item = self.raw_queue.get()
+            if item is _STOP:
+                break
+            place_name, rid, html = item
+            start_time = time.time()
+            try:
+                lead = Lead.from_record(parse_result_html(html, rid), place_name, rid)
+                self._count("parsed")
+            except Exception as e:
+                print(f"      ✗ Fout bij parsen van data-rid {rid}: {str(e)}")
+                lead = None
+            observe("parse", time.time() - start_time)
+            self.lead_queue.put((place_name, rid, lead))
+
+    def _write_loop(self):
+        while True:
+            item = self.lead_queue.get()
+            if item is _STOP:
+                break
+
+            place_name, rid, lead = item
+            ok = False
+            if lead is not None:
+                start_time = time.time()
+                try:
+                    self.save_entry(lead)
+                    ok = True
+                except Exception as e:
+                    print(f"      ✗ Fout bij opslaan van data-rid {rid}: {str(e)}")
+                observe("write", time.time() - start_time)
+            self._count("saved" if ok else "failed")
+            if self.on_saved:
+                self.on_saved(place_name, rid, ok)
+            self._result_done(place_name)
+
+    def close(self):
+        """Stop accepting results, let the parsers and the writer finish everything in flight, and wait for them."""
+        if self.closed:
+            return
+        self.closed = True
+        for _ in self.parsers:
+            self.raw_queue.put(_STOP)
+        for thread in self.parsers:
+            thread.join()
+        # All parsers are done, so every lead is in the lead queue ahead of this stop marker
+        self.lead_queue.put(_STOP)
+        self.writer.join()
+
+    def stats(self):
+        return {
+            "counts": dict(self.counts),
+            "queues": {stage.name: stage.stats() for stage in (self.raw_queue, self.lead_queue)},
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print("\n--- Pipeline ---")
+        print("  " + ", ".join(f"{name}: {count}" for name, count in stats["counts"].items()))
+        for name, queue_stats in stats["queues"].items():
+            print(f"  {name} queue: max depth {queue_stats['max_depth']}/{queue_stats['maxsize']}, "
+                  f"producer blocked {queue_stats['blocked_puts']}x for {queue_stats['blocked_seconds']}s")
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+# Append-only progress journal. Every event is one short tab-separated line:
+#   P <status> <place>          progress of a whole place
+#   R <status> <place> <rid>    progress of a single search result (data-rid)
+# The last line for a place or result wins, so a retried failure that later completes counts as completed.
+# A place without any driving schools is journaled as no results (done, like completed); places a run
+# didn't get to because the yield model stopped it early are journaled as stopped early (not done, a
+# later --resume searches them).
+COMPLETED = "c"
+FAILED = "f"
+SKIPPED = "s"
+NO_RESULTS = "n"
+STOPPED_EARLY = "e"
+STATUS_NAMES = {COMPLETED: "completed", FAILED: "failed", SKIPPED: "skipped", NO_RESULTS: "no results",
+                STOPPED_EARLY: "stopped early"}
+
+
+def read_journal(path):
+    """The last status of every place ({place: status}) and result ({(place, rid): status}) in a journal file."""
+    place_status = {}
+    result_status = {}
+    if not os.path.exists(path):
+        return place_status, result_status
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) == 3 and parts[0] == "P":
+                place_status[parts[2]] = parts[1]
+            elif len(parts) == 4 and parts[0] == "R":
+                result_status[(parts[2], parts[3])] = parts[1]
+    return place_status, result_status
+
+
+class ProgressJournal:
+    """Buffers journal lines and writes + fsyncs them in batches so the scrape loop doesn't wait on the disk."""
+
+    def __init__(self, path, resume=False, batch_size=50, flush_interval=2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.place_status = {}
+        self.result_status = {}
+        if resume:
+            self.load()
+
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+        self.pending = []
+        self.last_flush = time.time()
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Read the existing journal into place_status and result_status."""
+        self.place_status, self.result_status = read_journal(self.path)
+
+    def is_place_done(self, place):
+        return self.place_status.get(place) in (COMPLETED, NO_RESULTS)
+
+    def is_result_done(self, place, rid):
+        return self.result_status.get((place, rid)) in (COMPLETED, SKIPPED)
+
+    def record_place(self, place, status):
+        self.place_status[place] = status
+        self._append(f"P\t{status}\t{place}\n")
+
+    def record_result(self, place, rid, status):
+        self.result_status[(place, rid)] = status
+        self._append(f"R\t{status}\t{place}\t{rid}\n")
+
+    def _append(self, line):
+        with self.lock:
+            self.pending.append(line)
+            if len(self.pending) >= self.batch_size or time.time() - self.last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        if self.pending:
+            self.file.write("".join(self.pending))
+            self.pending = []
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.last_flush = time.time()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            self.file.close()
+
+    def summary(self):
+        """Count places and results per status, e.g. {'places': {'completed': 3}, 'results': {...}}."""
+        summary = {"places": {}, "results": {}}
+        for key, statuses in (("places", self.place_status), ("results", self.result_status)):
+            for status in statuses.values():
+                name = STATUS_NAMES.get(status, status)
+                summary[key][name] = summary[key].get(name, 0) + 1
+        return summary
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import threading
+
+# Row hashes for the incremental refresh mode. A refresh run only reads the result list of each
+# place (the data-rid and the text of every row, no clicks) and compares a hash of it with the
+# hash stored in the previous run. Only rows that are new or whose text changed are clicked and
+# extracted again; rows that disappeared from a place are reported as removed.
+#
+# A row's hash is only stored once its lead is saved, so a result whose extraction failed still
+# counts as changed in the next refresh.
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+
+
+def row_hash(rid, text):
+    """Short hash of a result row: its data-rid and its text with whitespace collapsed."""
+    row = rid + "\x00" + " ".join((text or "").split())
+    return hashlib.blake2b(row.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class RefreshIndex:
+    """Row hashes per place from the previous runs ({place: {rid: hash}}), plus the changes found in this run."""
+
+    def __init__(self, path):
+        self.path = path
+        self.hashes = {}
+        self.pending = {}
+        self.changes = {ADDED: [], REMOVED: [], MODIFIED: []}
+        self.unchanged = 0
+        self.lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.hashes = json.load(f)
+
+    def compare(self, place_name, rows):
+        """Compare the rows ({rid: row text}) of a place with the previous run.
+
+        Returns the set of rids that are new or changed and have to be extracted again. Removed rows
+        are dropped from the index right away.
+        """
+        with self.lock:
+            known = self.hashes.setdefault(place_name, {})
+            changed = set()
+            for rid, text in rows.items():
+                new_hash = row_hash(rid, text)
+                old_hash = known.get(rid)
+                if old_hash == new_hash:
+                    self.unchanged += 1
+                    continue
+                self.changes[ADDED if old_hash is None else MODIFIED].append({"place": place_name, "rid": rid})
+                self.pending[(place_name, rid)] = new_hash
+                changed.add(rid)
+            for rid in [rid for rid in known if rid not in rows]:
+                del known[rid]
+                self.changes[REMOVED].append({"place": place_name, "rid": rid})
+            return changed
+
+    def confirm(self, place_name, rid):
+        """Store the new hash of a changed row once its lead is saved."""
+        with self.lock:
+            new_hash = self.pending.pop((place_name, rid), None)
+            if new_hash is not None:
+                self.hashes.setdefault(place_name, {})[rid] = new_hash
+
+    def summary(self):
+        return dict({change: len(rows) for change, rows in self.changes.items()}, unchanged=self.unchanged)
+
+    def write_report(self, path):
+        """Write the added/removed/modified rows of this run as JSON."""
+        with self.lock:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(dict(self.changes, summary=self.summary()), f, ensure_ascii=False, indent=1)
+
+    def close(self):
+        with self.lock:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.hashes, f, ensure_ascii=False, sort_keys=True)
+            os.replace(temp_path, self.path)
@@ -1,20 +1,238 @@
-import pandas as pd
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from dataclasses import asdict
 
-# Read the CSV file
-df = pd.read_csv('rijscholen_leads.csv')
+from lead_store import Lead, CSV_HEADER, read_leads, normalize_email, normalize_phone, normalize_name
 
-# Get the original number of rows
-original_count = len(df)
-print(f"Original number of entries: {original_count}")
+# Streaming dedup of lead files. Rows are read one at a time; the only state is an on-disk SQLite
+# index, so memory use stays flat no matter how many rows the merged lead dumps have.
+#
+# Two rows are the same school when they share a dedup key:
+#   e:<email>          the normalized email address
+#   p:<name>|<phone>   normalized name together with the normalized phone number
+# Phone numbers are only used together with the name, because scrapes contain many different
+# schools that got the same (wrong) phone number.
+#
+# The normalized name (n:<name>) is indexed for every row, but only joins rows when one side has
+# neither email nor phone: a name-only row is merged into a school of the same name, and a row
+# with contact details absorbs the name-only schools of its name. Two rows that both have contact
+# details still need a shared email or name + phone.
+#
+# Per school the most complete row is kept; fields it is missing are filled in from the other rows.
+INDEX_SCHEMA = """
+CREATE TABLE schools (
+    id INTEGER PRIMARY KEY,
+    score INTEGER,
+    name TEXT, phone TEXT, email TEXT, website TEXT, place TEXT, rid TEXT, scraped_at TEXT
+);
+CREATE TABLE dedup_keys (
+    key BLOB PRIMARY KEY,
+    school INTEGER
+) WITHOUT ROWID;
+CREATE INDEX dedup_keys_school ON dedup_keys(school);
+CREATE TABLE name_keys (
+    key BLOB,
+    school INTEGER,
+    PRIMARY KEY (key, school)
+) WITHOUT ROWID;
+CREATE INDEX name_keys_school ON name_keys(school);
+"""
+FIELDS = ["name", "phone", "email", "website", "place", "rid", "scraped_at"]
+CONTACT_FIELDS = ["name", "phone", "email", "website"]
 
-# Remove duplicates based on all columns
-df_cleaned = df.drop_duplicates()
 
-# Get the new number of rows
-cleaned_count = len(df_cleaned)
-print(f"Number of entries after removing duplicates: {cleaned_count}")
-print(f"Removed {original_count - cleaned_count} duplicate entries")
+def _hash_key(key):
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
 
-# Save the cleaned data back to the file
-df_cleaned.to_csv('rijscholen_leads_cleaned.csv', index=False)
-print("Cleaned data saved to rijscholen_leads_cleaned.csv") 
\ No newline at end of file
+
+def dedup_keys(lead):
+    """Hashed email and name + phone dedup keys of a lead (16 bytes each, so the index stays small)."""
+    email = normalize_email(lead.email)
+    phone = normalize_phone(lead.phone)
+    name = normalize_name(lead.name)
+
+    keys = []
+    if email:
+        keys.append("e:" + email)
+    if name and phone:
+        keys.append(f"p:{name}|{phone}")
+    return [_hash_key(key) for key in keys]
+
+
+def name_key(lead):
+    """Hashed name key of a lead, or None when it has no name."""
+    name = normalize_name(lead.name)
+    return _hash_key("n:" + name) if name else None
+
+
+def has_contact(lead):
+    """Whether a lead has an email or a phone number to recognise it by."""
+    return bool(normalize_email(lead.email) or normalize_phone(lead.phone))
+
+
+def completeness(lead):
+    """How complete a lead is: the number of contact fields that are filled in."""
+    return sum(1 for field in CONTACT_FIELDS if getattr(lead, field))
+
+
+def merge_leads(leads):
+    """Most complete lead (newest on a tie), with its empty fields filled in from the others."""
+    leads = sorted(leads, key=lambda lead: (completeness(lead), lead.scraped_at or ""), reverse=True)
+    best = Lead(**asdict(leads[0]))
+    for other in leads[1:]:
+        for field in FIELDS:
+            if not getattr(best, field) and getattr(other, field):
+                setattr(best, field, getattr(other, field))
+    return best
+
+
+class DedupIndex:
+    """On-disk index of the schools seen so far and the dedup keys pointing at them."""
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=OFF")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute("PRAGMA cache_size=-65536")  # at most 64 MB of page cache
+        self.connection.executescript(INDEX_SCHEMA)
+        self.connection.execute("BEGIN")
+        self.stats = {"rows": 0, "schools": 0, "duplicates": 0, "merged_groups": 0, "no_keys": 0}
+
+    def _load(self, school_id):
+        row = self.connection.execute(f"SELECT {', '.join(FIELDS)} FROM schools WHERE id = ?", (school_id,)).fetchone()
+        return Lead(*row)
+
+    def _store(self, school_id, lead):
+        self.connection.execute(
+            f"UPDATE schools SET score = ?, {', '.join(f'{field} = ?' for field in FIELDS)} WHERE id = ?",
+            (completeness(lead), *[getattr(lead, field) for field in FIELDS], school_id))
+
+    def _name_matches(self, key, contact):
+        """Schools a row with this name key joins: for a name-only row the first school of that name,
+        for a row with contact details the schools of that name that have none."""
+        if key is None:
+            return set()
+        name_schools = [row[0] for row in self.connection.execute(
+            "SELECT school FROM name_keys WHERE key = ? ORDER BY school", (key,))]
+        if not contact:
+            return set(name_schools[:1])
+        return {school_id for school_id in name_schools if not has_contact(self._load(school_id))}
+
+    def add(self, lead):
+        self.stats["rows"] += 1
+        keys = dedup_keys(lead)
+        lead_name_key = name_key(lead)
+        if not keys and lead_name_key is None:
+            # Nothing to recognise this row by, keep it as it is
+            self.stats["no_keys"] += 1
+
+        placeholders = ", ".join("?" * len(keys))
+        matched = {row[0] for row in self.connection.execute(
+            f"SELECT DISTINCT school FROM dedup_keys WHERE key IN ({placeholders})", keys)} if keys else set()
+        school_ids = sorted(matched | self._name_matches(lead_name_key, has_contact(lead)))
+
+        if not school_ids:
+            cursor = self.connection.execute(
+                f"INSERT INTO schools (score, {', '.join(FIELDS)}) VALUES (?{', ?' * len(FIELDS)})",
+                (completeness(lead), *[getattr(lead, field) for field in FIELDS]))
+            school_id = cursor.lastrowid
+            self.stats["schools"] += 1
+        else:
+            # This row is a duplicate; when it links several schools together they become one school
+            school_id = school_ids[0]
+            self.stats["duplicates"] += 1
+            merged = merge_leads([lead] + [self._load(other_id) for other_id in school_ids])
+            self._store(school_id, merged)
+            for other_id in school_ids[1:]:
+                self.connection.execute("UPDATE dedup_keys SET school = ? WHERE school = ?", (school_id, other_id))
+                self.connection.execute("UPDATE OR IGNORE name_keys SET school = ? WHERE school = ?", (school_id, other_id))
+                self.connection.execute("DELETE FROM name_keys WHERE school = ?", (other_id,))
+                self.connection.execute("DELETE FROM schools WHERE id = ?", (other_id,))
+                self.stats["merged_groups"] += 1
+                self.stats["schools"] -= 1
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO dedup_keys (key, school) VALUES (?, ?)", [(key, school_id) for key in keys])
+        if lead_name_key is not None:
+            self.connection.execute("INSERT OR IGNORE INTO name_keys (key, school) VALUES (?, ?)",
+                                    (lead_name_key, school_id))
+
+        if self.stats["rows"] % 10000 == 0:
+            self.connection.execute("COMMIT")
+            self.connection.execute("BEGIN")
+
+    def schools(self):
+        """Yield the deduplicated leads in the order they were first seen."""
+        self.connection.execute("COMMIT")
+        for row in self.connection.execute(f"SELECT {', '.join(FIELDS)} FROM schools ORDER BY id"):
+            yield Lead(*row)
+
+    def close(self):
+        self.connection.close()
+
+
+def write_leads(leads, path):
+    """Write leads as CSV (lead_store layout) or, for a .jsonl path, as JSON Lines. Returns the count."""
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            for lead in leads:
+                f.write(json.dumps(asdict(lead), ensure_ascii=False) + "\n")
+                count += 1
+        else:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            for lead in leads:
+                writer.writerow(lead.to_row())
+                count += 1
+    return count
+
+
+def remove_duplicates(input_paths, output_path, index_path=None):
+    """Deduplicate the leads of all input files into output_path. Returns the merge statistics."""
+    temp_dir = None
+    if index_path is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        index_path = os.path.join(temp_dir.name, "dedup_index.sqlite")
+    elif os.path.exists(index_path):
+        os.remove(index_path)
+
+    start_time = time.time()
+    index = DedupIndex(index_path)
+    try:
+        for path in input_paths:
+            print(f"Reading {path}")
+            for lead in read_leads(path):
+                index.add(lead)
+        written = write_leads(index.schools(), output_path)
+    finally:
+        index.close()
+        if temp_dir:
+            temp_dir.cleanup()
+
+    stats = dict(index.stats, written=written, seconds=round(time.time() - start_time, 2))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove duplicate schools from one or more lead files.")
+    parser.add_argument("inputs", nargs="*", default=["rijscholen_leads.csv"],
+                        help="Lead files (CSV or .jsonl) to merge (default: rijscholen_leads.csv)")
+    parser.add_argument("-o", "--output", default="rijscholen_leads_cleaned.csv",
+                        help="Output file, .jsonl for JSON Lines (default: rijscholen_leads_cleaned.csv)")
+    parser.add_argument("--index", help="Keep the on-disk dedup index at this path instead of a temporary file")
+    args = parser.parse_args()
+
+    stats = remove_duplicates(args.inputs, args.output, args.index)
+    print(f"Original number of entries: {stats['rows']}")
+    print(f"Number of entries after removing duplicates: {stats['written']}")
+    print(f"Removed {stats['duplicates']} duplicate entries "
+          f"({stats['merged_groups']} times two groups of rows turned out to be the same school)")
+    print(f"Rows without email, phone or name: {stats['no_keys']}")
+    print(f"Cleaned data saved to {args.output} in {stats['seconds']}s")
@@ -0,0 +1,210 @@
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Optional
+from urllib.parse import urlparse
+import argparse
+import glob
+import json
+import os
+import time
+
+from contact_parser import clean_phone
+
+# Texts of page elements whose class contains "name" but that are not a school name
+IGNORED_NAMES = {
+    "Rijschoolzoeker", "Examenlocaties", "Resultaten voor Auto", "Geef ons je feedback!",
+    "Auto", "Motor", "Bromfiets", "Rijschool",
+}
+IGNORED_NAME_PREFIXES = ("resultaten", "geen", "niet", "klik", "selecteer")
+WEBSITE_EXCLUDES = ('mailto:', 'tel:', 'javascript:', '#')
+# Hosts of the site's own header/footer links (e.g. https://www.cbr.nl/rijbewijstips); never a school's website
+CHROME_HOSTS = ("cbr.nl",)
+
+
+def is_chrome_link(url):
+    """True for links to the rijschoolzoeker site itself rather than to a driving school."""
+    url = (url or "").strip().lower()
+    host = urlparse(url if "://" in url else "http://" + url).hostname or ""
+    return any(host == chrome_host or host.endswith("." + chrome_host) for chrome_host in CHROME_HOSTS)
+
+
+@dataclass
+class Record:
+    """Contact details of one driving school, as shown in an expanded search result."""
+    name: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    website: Optional[str] = None
+
+
+class _ResultHTMLParser(HTMLParser):
+    """Collects the text of name elements and all links of a result snapshot in one pass.
+
+    With a scope_rid only the element with that data-rid and its contents are looked at, so a
+    snapshot of the whole page gives the same record as a snapshot of just the result.
+    """
+
+    VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self, scope_rid=None):
+        super().__init__(convert_charrefs=True)
+        self.names = []
+        self.links = []
+        self.scope_rid = scope_rid
+        self.scope_open = 0
+        # Stack of (tag, name_index, link_index, is_scope) for the open elements, so text can be
+        # attributed to the innermost name element and link it belongs to
+        self.stack = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID_TAGS:
+            return
+        attrs = dict(attrs)
+        classes = attrs.get("class") or ""
+
+        is_scope = self.scope_rid is not None and attrs.get("data-rid") == self.scope_rid
+        if is_scope:
+            self.scope_open += 1
+        in_scope = self.scope_rid is None or self.scope_open > 0
+
+        name_index = None
+        if in_scope and "name" in classes:
+            self.names.append([])
+            name_index = len(self.names) - 1
+
+        link_index = None
+        if in_scope and tag == "a":
+            self.links.append({"href": (attrs.get("href") or "").strip(), "class": classes, "text": []})
+            link_index = len(self.links) - 1
+
+        self.stack.append((tag, name_index, link_index, is_scope))
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags have no text
+        pass
+
+    def handle_endtag(self, tag):
+        # Pop up to and including the matching start tag; tolerates unclosed elements
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                self.scope_open -= sum(1 for entry in self.stack[i:] if entry[3])
+                del self.stack[i:]
+                break
+
+    def handle_data(self, data):
+        for _, name_index, link_index, _ in self.stack:
+            if name_index is not None:
+                self.names[name_index].append(data)
+            if link_index is not None:
+                self.links[link_index]["text"].append(data)
+
+
+def _clean_text(parts):
+    return " ".join("".join(parts).split())
+
+
+def _is_school_name(text):
+    return (len(text) > 3 and
+            text not in IGNORED_NAMES and
+            not text.lower().startswith(IGNORED_NAME_PREFIXES))
+
+
+def _pick_website(links):
+    # Prefer the link the site marks as the school's website, then any other absolute link
+    candidates = [link for link in links if "website" in link["class"]]
+    candidates += [link for link in links if link not in candidates]
+    for link in candidates:
+        for url in (link["href"], _clean_text(link["text"])):
+            if url and ('http://' in url or 'https://' in url or 'www.' in url):
+                if len(url) > 10 and '.' in url and not any(exclude in url.lower() for exclude in WEBSITE_EXCLUDES):
+                    if not is_chrome_link(url):
+                        return url
+    return None
+
+
+def parse_result_html(html, rid=None) -> Record:
+    """Parse the HTML of an expanded search result into a Record with name, phone, email and website.
+
+    html is normally just the result's outerHTML; for a larger snapshot pass the result's data-rid
+    and everything outside that result is ignored.
+    """
+    parser = _ResultHTMLParser(rid)
+    parser.feed(html)
+    parser.close()
+
+    record = Record()
+    for parts in parser.names:
+        name = _clean_text(parts).replace(',', '')
+        if _is_school_name(name):
+            record.name = name
+            break
+
+    for link in parser.links:
+        href = link["href"]
+        if record.email is None and href.lower().startswith('mailto:'):
+            email_address = href[7:].split('?')[0].strip()
+            if len(email_address) > 5 and '@' in email_address and '.' in email_address:
+                record.email = email_address
+        elif record.phone is None and href.lower().startswith('tel:'):
+            phone_number = href[4:].strip()
+            if len(phone_number) > 5 and any(char.isdigit() for char in phone_number):
+                record.phone = clean_phone(phone_number)
+
+    record.website = _pick_website(parser.links)
+    return record
+
+
+def benchmark(paths, repeat=1000):
+    """Parse every fixture repeat times and print the parsed record and the time per parse."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            record = parse_result_html(html)
+        per_parse = (time.perf_counter() - start_time) / repeat
+
+        print(f"{os.path.basename(path)}: {record}")
+        print(f"  {per_parse * 1e6:.1f} µs per parse ({len(html)} bytes)")
+
+
+def check_fixtures(directory):
+    """Parse every HTML fixture that has an expected .json next to it. Returns the mismatches.
+
+    The .json holds the expected name/phone/email/website and optionally the data-rid to scope to.
+    """
+    failures = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        expected_path = os.path.splitext(path)[0] + ".json"
+        if not os.path.exists(expected_path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        with open(expected_path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+        record = parse_result_html(html, expected.get("rid"))
+        for field_name in ("name", "phone", "email", "website"):
+            if field_name in expected and getattr(record, field_name) != expected[field_name]:
+                failures.append((os.path.basename(path), field_name, expected[field_name], getattr(record, field_name)))
+    return failures
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Parse saved result HTML fixtures and time parse_result_html.")
+    parser.add_argument("paths", nargs="*", help="HTML files (default: fixtures/results/*.html)")
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--check", metavar="DIR", nargs="?", const=os.path.join(script_dir, "fixtures", "regression"),
+                        help="Compare the fixtures in DIR with their expected .json (default: fixtures/regression)")
+    args = parser.parse_args()
+
+    if args.check:
+        failures = check_fixtures(args.check)
+        for name, field_name, expected, found in failures:
+            print(f"✗ {name}: expected {field_name} {expected!r}, found {found!r}")
+        print(f"{'✓' if not failures else '✗'} {len(failures)} failures in {args.check}")
+        raise SystemExit(1 if failures else 0)
+
+    paths = args.paths or sorted(glob.glob(os.path.join(script_dir, "fixtures", "results", "*.html")))
+    benchmark(paths, args.repeat)
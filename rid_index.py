@@ -0,0 +1,51 @@
+import os
+import threading
+
+
+class RidIndex:
+    """Persistent set of data-rid values that were already scraped, one rid per line in a text file.
+
+    Loaded once at startup so known schools can be skipped before they are clicked. A rid is claimed
+    in memory as soon as its result is handled, so the next place already skips it, and only appended
+    to the file (write) once its lead is on disk; the file is only ever appended to.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rids = set()
+        self.clicks_saved = 0
+        self.lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.rids.update(line.strip() for line in f if line.strip())
+        self.file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def __contains__(self, rid):
+        return rid in self.rids
+
+    def __len__(self):
+        return len(self.rids)
+
+    def claim(self, rid):
+        """Remember rid as scraped for this run. Returns False if it was already known."""
+        with self.lock:
+            if rid in self.rids:
+                return False
+            self.rids.add(rid)
+            return True
+
+    def write(self, rid):
+        """Append a claimed rid to the file, once its lead is on disk."""
+        with self.lock:
+            self.rids.add(rid)
+            self.file.write(rid + "\n")
+
+    def count_skipped(self, count):
+        """Add to the number of result clicks saved by skipping known rids."""
+        with self.lock:
+            self.clicks_saved += count
+
+    def close(self):
+        with self.lock:
+            self.file.close()
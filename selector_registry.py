@@ -0,0 +1,297 @@
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Candidate selectors per scrape stage, with success and latency statistics kept across runs.
+# Every stage tries its candidates fastest-working-first: selectors that were never tried go
+# first (in the order listed here) so each one gets timed at least once, selectors that found
+# something are ranked by their average lookup time divided by how often they work, and
+# selectors that never worked come last. Every EXPLORE_EVERY lookups of a stage one of the
+# slower working selectors is tried first instead, in turn, so a selector that got faster (or a
+# first timing that was unlucky) can still move up. A selector that stops working on the live
+# site drops down by itself and the next one takes over.
+#
+# A lookup only shows that a selector found something, not that clicking it does the right thing.
+# Stages in FIXED_ORDER therefore keep the order listed here and are never explored: for
+# result_toggle a faster selector that finds a link or a name cell would score as well as the
+# button that opens the details. Their check only lets through elements that work as a toggle.
+#
+# Selectors starting with "/" or "./" are XPath, everything else is CSS.
+RID_SELECTOR = "[data-rid]:not([data-rid='']):not([data-rid='None'])"
+STAGE_CANDIDATES = {
+    # The 'Auto' vehicle button that appears after a place is searched
+    "auto_button": [
+        "//a[contains(@class, 'vehicle')]//span[text()='Auto']",
+        "//span[text()='Auto']",
+        "//span[contains(text(), 'Auto')]",
+        "ul.vehicles li.vehicle_wrapper a.vehicle span.vehicle_name",
+        "span.vehicle_name",
+        ".vehicle_name",
+    ],
+    # The element holding the sort options
+    "sort_dropdown": [
+        "[class*='sort']",
+        "select",
+        "[class*='dropdown']",
+        "[class*='filter']",
+        "[class*='sorteren']",
+        "button[aria-haspopup='true']",
+    ],
+    # The 'Alfabetisch A - Z' sort option
+    "sort_option": [
+        "//*[contains(text(), 'Alfabetisch A - Z')]",
+        "//*[contains(text(), 'Alfabetisch A-Z')]",
+        "//*[contains(text(), 'Alfabetisch')]",
+        "//option[contains(text(), 'Alfabetisch')]",
+        "//li[contains(text(), 'Alfabetisch')]",
+        "//button[contains(text(), 'Alfabetisch')]",
+    ],
+    # The result rows, each with a data-rid
+    "result_rows": [
+        "[class*='row']",
+        RID_SELECTOR,
+        "div.table-row",
+        ".table-row",
+        "[class*='result']",
+        "[class*='item']",
+    ],
+    # The element to click inside a result row to expand it
+    "result_toggle": [
+        "button",
+        "a",
+        "[class*='name']",
+        ".cell--name",
+        ".result-name",
+        ".item-name",
+    ],
+}
+EXPLORE_EVERY = 20
+FIXED_ORDER = ("result_toggle",)
+
+
+def _is_auto(element):
+    return element.text.strip() == "Auto"
+
+
+def _is_sort_dropdown(element):
+    text = element.text.strip().lower()
+    return any(keyword in text for keyword in ['sorteren', 'sort', 'filter', 'dropdown'])
+
+
+def _is_alphabetical(element):
+    return 'alfabetisch' in element.text.strip().lower()
+
+
+def _has_rid(element):
+    return element.get_attribute('data-rid') not in (None, '', 'None')
+
+
+def _is_toggle(element):
+    if element.tag_name == 'button' or element.get_attribute('role') == 'button':
+        return True
+    return 'toggle' in (element.get_attribute('class') or '') or element.get_attribute('aria-expanded') is not None
+
+
+# Which of the elements a selector finds are what the stage is looking for (None: all of them)
+STAGE_CHECKS = {
+    "auto_button": _is_auto,
+    "sort_dropdown": _is_sort_dropdown,
+    "sort_option": _is_alphabetical,
+    "result_rows": _has_rid,
+    "result_toggle": _is_toggle,
+}
+# Selectors that only find elements passing the stage's check, so it isn't run (one round trip per element)
+PRECHECKED = {
+    "result_rows": {RID_SELECTOR},
+    "result_toggle": {"button"},
+}
+
+
+def locator(selector):
+    """The (By, selector) pair for a CSS or XPath selector."""
+    return (By.XPATH if selector.startswith(("/", "./")) else By.CSS_SELECTOR, selector)
+
+
+def find_matching(root, stage, selector):
+    """The elements below root (a driver or element) that selector finds and that pass the stage's check."""
+    elements = root.find_elements(*locator(selector))
+    check = STAGE_CHECKS.get(stage)
+    if check is None or selector in PRECHECKED.get(stage, ()):
+        return elements
+    matching = []
+    for element in elements:
+        try:
+            if check(element):
+                matching.append(element)
+        except WebDriverException:
+            continue
+    return matching
+
+
+class SelectorRegistry:
+    """Ranks the candidate selectors of every stage by how fast and how reliably they found something.
+
+    The statistics ({stage: {selector: {"tries", "hits", "hit_seconds"}}}) are loaded from and
+    saved to path, when given.
+    """
+
+    def __init__(self, path=None, candidates=STAGE_CANDIDATES):
+        self.path = path
+        self.candidates = candidates
+        self.stats = {}
+        self.lookups = {}
+        self.lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.stats = json.load(f)
+
+    def _rank_key(self, stage, index, selector):
+        stats = self.stats.get(stage, {}).get(selector)
+        if not stats or not stats["tries"]:
+            return (0, index)
+        if not stats["hits"]:
+            return (2, index)
+        hit_rate = stats["hits"] / stats["tries"]
+        return (1, stats["hit_seconds"] / stats["hits"] / hit_rate)
+
+    def ranked(self, stage, explore=False):
+        """The stage's candidate selectors, best first.
+
+        With explore, every EXPLORE_EVERY calls one of the slower working selectors is moved to the front.
+        Stages in FIXED_ORDER always give their candidates in the listed order.
+        """
+        with self.lock:
+            candidates = self.candidates[stage]
+            if stage in FIXED_ORDER:
+                return list(candidates)
+            keys = {selector: self._rank_key(stage, index, selector) for index, selector in enumerate(candidates)}
+            ranked = sorted(candidates, key=keys.get)
+            if not explore:
+                return ranked
+            lookups = self.lookups[stage] = self.lookups.get(stage, 0) + 1
+            slower = [selector for selector in ranked[1:] if keys[selector][0] == 1]
+            if lookups % EXPLORE_EVERY == 0 and slower:
+                explored = slower[(lookups // EXPLORE_EVERY - 1) % len(slower)]
+                ranked.remove(explored)
+                ranked.insert(0, explored)
+            return ranked
+
+    def best(self, stage):
+        return self.ranked(stage)[0]
+
+    def record(self, stage, selector, ok, seconds):
+        """Add one lookup of selector to the statistics."""
+        with self.lock:
+            stats = self.stats.setdefault(stage, {}).setdefault(selector, {"tries": 0, "hits": 0, "hit_seconds": 0.0})
+            stats["tries"] += 1
+            if ok:
+                stats["hits"] += 1
+                stats["hit_seconds"] += seconds
+
+    def locate(self, root, stage, timeout=0):
+        """Find the stage's elements below root with the best working selector. Returns [] if none works.
+
+        With a timeout every selector is waited for up to timeout seconds before the next one is tried.
+        """
+        for selector in self.ranked(stage, explore=True):
+            start_time = time.time()
+            try:
+                if timeout:
+                    elements = WebDriverWait(root, timeout, poll_frequency=0.05).until(
+                        lambda r: find_matching(r, stage, selector))
+                else:
+                    elements = find_matching(root, stage, selector)
+            except (TimeoutException, WebDriverException):
+                elements = []
+            self.record(stage, selector, bool(elements), time.time() - start_time)
+            if elements:
+                return elements
+            print(f"    ✗ {stage}: selector {selector} found nothing")
+        return []
+
+    def report(self):
+        """Rows of (stage, selector, tries, hits, average ms per hit), best selector of each stage first."""
+        rows = []
+        for stage in self.candidates:
+            for selector in self.ranked(stage):
+                stats = self.stats.get(stage, {}).get(selector, {"tries": 0, "hits": 0, "hit_seconds": 0.0})
+                average_ms = stats["hit_seconds"] / stats["hits"] * 1000 if stats["hits"] else None
+                rows.append((stage, selector, stats["tries"], stats["hits"], average_ms))
+        return rows
+
+    def print_report(self):
+        print(f"{'stage':<14} {'hits':>9} {'avg ms':>8}  selector")
+        for stage, selector, tries, hits, average_ms in self.report():
+            average = f"{average_ms:.2f}" if average_ms is not None else "-"
+            print(f"{stage:<14} {f'{hits}/{tries}':>9} {average:>8}  {selector}")
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.stats, f, indent=1, sort_keys=True)
+            os.replace(temp_path, self.path)
+
+
+def benchmark(registry, paths, repeat=20):
+    """Replay saved pages in a headless browser through every candidate of every stage and record the timings.
+
+    Page stages are timed on the whole page, result_toggle on each page's first result row.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.edge.options import Options
+
+    options = Options()
+    options.add_argument("--headless=new")
+    driver = webdriver.Edge(options=options)
+    try:
+        for path in paths:
+            driver.get("file://" + os.path.abspath(path))
+            rows = driver.find_elements(By.CSS_SELECTOR, "[data-rid]")
+            for stage, candidates in registry.candidates.items():
+                root = driver if stage != "result_toggle" else (rows[0] if rows else None)
+                if root is None:
+                    continue
+                for selector in candidates:
+                    for _ in range(repeat):
+                        start_time = time.perf_counter()
+                        try:
+                            ok = bool(find_matching(root, stage, selector))
+                        except WebDriverException:
+                            ok = False
+                        registry.record(stage, selector, ok, time.perf_counter() - start_time)
+            print(f"Replayed {path}")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Show or benchmark the selector rankings per scrape stage.")
+    parser.add_argument("--stats", default="selector_stats.json",
+                        help="Selector statistics file of the scraper (default: selector_stats.json)")
+    parser.add_argument("--benchmark", nargs="*", metavar="HTML",
+                        help="Replay saved pages (default: fixtures/pages/*.html) through all candidates and rank them")
+    parser.add_argument("--repeat", type=int, default=20, help="Lookups per selector and page (default: 20)")
+    parser.add_argument("--save", action="store_true", help="Add the benchmark timings to --stats")
+    args = parser.parse_args()
+
+    if args.benchmark is None:
+        SelectorRegistry(args.stats).print_report()
+    else:
+        # With --save the timings are added to the scraper's statistics, otherwise ranked on their own
+        registry = SelectorRegistry(args.stats if args.save else None)
+        paths = args.benchmark or sorted(glob.glob(os.path.join(script_dir, "fixtures", "pages", "*.html")))
+        benchmark(registry, paths, args.repeat)
+        registry.print_report()
+        registry.save()
@@ -0,0 +1,170 @@
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+from datascraper import load_dutch_places
+from progress_journal import COMPLETED, NO_RESULTS, STOPPED_EARLY, STATUS_NAMES, read_journal
+from remove_duplicates import remove_duplicates
+
+# Runs the scraper as K separate OS processes. The place list is split round-robin into K shards;
+# every shard is a datascraper.py process with its own browser, its own output directory
+# (shards/shard-<k>/) with partial lead files, journal and seen data-rids, and its own log. A
+# crashed driver or process therefore only takes its own shard down, and the processes don't
+# share a GIL.
+#
+# The supervisor polls the processes. A shard that crashes (a non-zero exit code, or killed by a
+# signal) while some of its places aren't finished in its journal is started again with --resume,
+# up to --max-restarts times. Finished means completed, no results, or stopped early by the yield
+# model. A shard that exits cleanly with failed places left is reported and not restarted: running
+# it again would only fail the same places. When all shards are done, the partial lead files are
+# merged with remove_duplicates into one deduplicated file.
+#
+# Everything after -- is passed to every shard, e.g.
+#   python shard_runner.py --shards 4 -- --reuse-page --browser chrome
+script_dir = os.path.dirname(os.path.abspath(__file__))
+SCRAPER = os.path.join(script_dir, "datascraper.py")
+POLL_INTERVAL = 1.0
+FINISHED = (COMPLETED, NO_RESULTS, STOPPED_EARLY)
+
+
+def split_places(places, num_shards):
+    """Deal the places round-robin over num_shards shards, so every shard gets a similar mix."""
+    return [places[shard::num_shards] for shard in range(num_shards)]
+
+
+class Shard:
+    """One scraper process, its places and its output directory."""
+
+    def __init__(self, number, places, output_dir, scraper_args):
+        self.number = number
+        self.places = places
+        self.output_dir = os.path.join(output_dir, f"shard-{number}")
+        self.scraper_args = scraper_args
+        self.process = None
+        self.restarts = 0
+        self.started_at = None
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.places_path = os.path.join(self.output_dir, "places.json")
+        with open(self.places_path, "w", encoding="utf-8") as f:
+            json.dump({"plaatsnamen": places}, f, ensure_ascii=False)
+
+    def start(self, resume=False):
+        command = [sys.executable, SCRAPER, "--places", self.places_path, "--output-dir", self.output_dir]
+        if resume or "--resume" in self.scraper_args:
+            command.append("--resume")
+        command += [arg for arg in self.scraper_args if arg != "--resume"]
+        if "--lead-batch" not in self.scraper_args:
+            # Every lead is on disk before its rid counts as seen, so a killed shard loses no leads on restart
+            command += ["--lead-batch", "1"]
+        log = open(os.path.join(self.output_dir, "scraper.log"), "a", encoding="utf-8")
+        self.process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, cwd=script_dir)
+        log.close()
+        self.started_at = time.time()
+
+    def places_left(self):
+        """The shard's places that aren't finished in its journal, with their status (None when never tried)."""
+        place_status, _ = read_journal(os.path.join(self.output_dir, "progress.journal"))
+        return {place: place_status.get(place) for place in self.places if place_status.get(place) not in FINISHED}
+
+    def lead_files(self):
+        return sorted(glob.glob(os.path.join(self.output_dir, "rijscholen_leads.*")) +
+                      glob.glob(os.path.join(self.output_dir, "leads_no_email.*")))
+
+
+def supervise(shards, max_restarts=3):
+    """Wait for all shards, starting the ones that crash with places left again.
+    Returns the shards that ended with places left."""
+    running = list(shards)
+    given_up = []
+    while running:
+        time.sleep(POLL_INTERVAL)
+        for shard in list(running):
+            exit_code = shard.process.poll()
+            if exit_code is None:
+                continue
+            left = shard.places_left()
+            seconds = time.time() - shard.started_at
+            if not left:
+                print(f"✓ Shard {shard.number} done: {len(shard.places)} places in {seconds:.0f}s")
+                running.remove(shard)
+            elif exit_code == 0:
+                statuses = {}
+                for status in left.values():
+                    name = STATUS_NAMES.get(status, "not tried")
+                    statuses[name] = statuses.get(name, 0) + 1
+                print(f"⚠️ Shard {shard.number} finished in {seconds:.0f}s with {len(left)} places left "
+                      f"({', '.join(f'{n} {name}' for name, n in statuses.items())}), not restarting: "
+                      f"{', '.join(left)}")
+                running.remove(shard)
+                given_up.append(shard)
+            elif shard.restarts < max_restarts:
+                shard.restarts += 1
+                print(f"🔁 Shard {shard.number} crashed (code {exit_code}) with {len(left)} places left, "
+                      f"restart {shard.restarts}/{max_restarts}")
+                shard.start(resume=True)
+            else:
+                print(f"✗ Shard {shard.number} gave up with {len(left)} places left after {max_restarts} restarts")
+                running.remove(shard)
+                given_up.append(shard)
+    return given_up
+
+
+def stop_shards(shards, timeout=60):
+    """Let running shards finish the result they're on (they get the Ctrl-C too) and stop the stragglers."""
+    for shard in shards:
+        if shard.process and shard.process.poll() is None:
+            try:
+                shard.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                shard.process.terminate()
+
+
+def merge_shards(shards, output_path):
+    """Merge the partial lead files of all shards into one deduplicated lead file."""
+    inputs = [path for shard in shards for path in shard.lead_files()]
+    if not inputs:
+        print("No partial lead files to merge")
+        return None
+    stats = remove_duplicates(inputs, output_path)
+    print(f"Merged {stats['rows']} leads of {len(shards)} shards into {stats['written']} leads "
+          f"({stats['duplicates']} duplicates) in {output_path}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the scraper as K processes over shards of the place list and merge their leads.",
+        epilog="Arguments after -- are passed to every datascraper.py process.")
+    parser.add_argument("--shards", type=int, default=os.cpu_count(),
+                        help=f"Number of scraper processes (default: the number of cores, {os.cpu_count()})")
+    parser.add_argument("--places", default="examen_plaatsen.json", help="Place list (default: examen_plaatsen.json)")
+    parser.add_argument("--output-dir", default="shards", help="Directory for the shard directories (default: shards)")
+    parser.add_argument("--max-restarts", type=int, default=3, help="Restarts per shard (default: 3)")
+    parser.add_argument("-o", "--output", default="rijscholen_leads_merged.csv",
+                        help="Merged lead file, .jsonl for JSON Lines (default: rijscholen_leads_merged.csv)")
+    parser.add_argument("--merge-only", action="store_true", help="Only merge the partial lead files of an earlier run")
+    args, scraper_args = parser.parse_known_args()
+    scraper_args = [arg for arg in scraper_args if arg != "--"]
+
+    places = load_dutch_places(args.places)
+    shards = [Shard(number, shard_places, args.output_dir, scraper_args)
+              for number, shard_places in enumerate(split_places(places, max(1, args.shards))) if shard_places]
+    if not args.merge_only:
+        print(f"Scraping {len(places)} places in {len(shards)} shards, logs in {args.output_dir}/shard-*/scraper.log")
+        start_time = time.time()
+        for shard in shards:
+            shard.start()
+        try:
+            given_up = supervise(shards, args.max_restarts)
+        except KeyboardInterrupt:
+            print("\n⏹️ Ctrl-C: waiting for the shards to save what they have...")
+            stop_shards(shards)
+            given_up = []
+        elapsed = time.time() - start_time
+        print(f"All shards finished in {elapsed:.1f}s ({len(places) / elapsed * 60:.1f} places/min)"
+              + (f", {len(given_up)} shards with places left" if given_up else ""))
+    merge_shards(shards, args.output)
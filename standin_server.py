@@ -0,0 +1,160 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import time
+
+# Local stand-in for the CBR rijschoolzoeker so the scraper can be run without cbr.nl.
+# It serves the page from fixtures/cbr/rijschoolzoeker.html and the JSON the page fetches
+# from fixtures/cbr/search/<plaats>.json and fixtures/cbr/detail/<rid>.json (hand-written, in
+# the shape of the http engine's unconfirmed endpoints). A fixtures directory recorded by
+# capture.py also has a network.jsonl: every GET that was recorded there is answered with the
+# recorded response. Every response can be delayed to mimic the real site's latency.
+script_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES = os.path.join(script_dir, "fixtures", "cbr")
+PAGE_PATH = "/nl/rijschoolzoeker"
+API_PATH = "/api/rijschoolzoeker"
+
+
+def place_slug(place_name):
+    """Turn a place name into the file name used for its search fixture."""
+    return re.sub(r"[^a-z0-9]+", "-", place_name.lower()).strip("-")
+
+
+def load_recording(fixtures_dir):
+    """{path with query: (status, content type, body path)} of the GET responses capture.py recorded, last one wins."""
+    recording = {}
+    path = os.path.join(fixtures_dir, "network.jsonl")
+    if not os.path.exists(path):
+        return recording
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            response = json.loads(line)
+            if response["method"] != "GET":
+                continue
+            url = urlparse(response["url"])
+            key = url.path + ("?" + url.query if url.query else "")
+            content_type = response.get("mime_type") or "application/octet-stream"
+            recording[key] = (response["status"], content_type, os.path.join(fixtures_dir, "bodies", response["body"]))
+    return recording
+
+
+def load_place_names():
+    """Load all place names for the autocomplete list."""
+    try:
+        with open(os.path.join(script_dir, "nederlandse_plaatsnamen.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("plaatsnamen", [])
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    fixtures_dir = DEFAULT_FIXTURES
+    place_names = []
+    recording = {}
+    latency = 0.0
+    jitter = 0.0
+
+    def do_GET(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        recorded = self.recording.get(self.path) if url.path not in ("/", PAGE_PATH) else None
+        if recorded:
+            self.send_recorded(*recorded)
+        elif url.path in ("/", PAGE_PATH):
+            self.send_file(os.path.join(self.fixtures_dir, "rijschoolzoeker.html"), "text/html; charset=utf-8")
+        elif url.path == API_PATH + "/plaatsen":
+            search = query.get("q", [""])[0].lower()
+            matches = [name for name in self.place_names if name.lower().startswith(search)][:10]
+            self.send_json({"plaatsen": matches})
+        elif url.path == API_PATH + "/zoeken":
+            self.send_search(query)
+        elif url.path.startswith(API_PATH + "/rijscholen/"):
+            rid = url.path.rsplit("/", 1)[-1]
+            self.send_file(os.path.join(self.fixtures_dir, "detail", f"{place_slug(rid)}.json"), "application/json")
+        else:
+            self.send_error(404)
+
+    def send_search(self, query):
+        place_name = query.get("plaats", [""])[0]
+        path = os.path.join(self.fixtures_dir, "search", f"{place_slug(place_name)}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {"plaats": place_name, "voertuig": "auto", "totaal": 0, "rijscholen": []}
+
+        if query.get("sortering", [""])[0] == "alfabetisch":
+            data["rijscholen"].sort(key=lambda school: school["naam"].lower())
+        self.send_json(data)
+
+    def send_recorded(self, status, content_type, body_path):
+        if status != 200:
+            self.send_error(status)
+            return
+        self.send_file(body_path, content_type)
+
+    def send_json(self, data):
+        self.send_body(json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def send_file(self, path, content_type):
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            self.send_error(404)
+            return
+        self.send_body(body, content_type)
+
+    def send_body(self, body, content_type):
+        # An ETag, so the conditional requests of http_cache.py get a 304 when nothing changed
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep the scraper output readable; the stand-in is only noisy on errors
+        pass
+
+
+def create_server(port=8000, fixtures_dir=DEFAULT_FIXTURES, latency=0.0, jitter=0.0):
+    """Create (but don't start) the stand-in server. Port 0 picks a free port (see server.server_address).
+    Every response waits latency seconds plus a random part of up to jitter seconds."""
+    StandinHandler.fixtures_dir = fixtures_dir
+    StandinHandler.place_names = load_place_names()
+    StandinHandler.recording = load_recording(fixtures_dir)
+    StandinHandler.latency = latency
+    StandinHandler.jitter = jitter
+    return ThreadingHTTPServer(("127.0.0.1", port), StandinHandler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local stand-in of the CBR rijschoolzoeker.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Directory with rijschoolzoeker.html, search/ and detail/, or a capture.py recording")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before every response (default: 0)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra random seconds per response")
+    args = parser.parse_args()
+
+    server = create_server(args.port, args.fixtures, args.latency, args.jitter)
+    print(f"Stand-in rijschoolzoeker on http://127.0.0.1:{args.port}{PAGE_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping stand-in server")
@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Per-place yield model, kept across runs in a small JSON file. For every place it records how
+# often the place was searched, how many results those searches listed and how many of them were
+# new leads. With it a run can search the places that are likely to give new leads first, and
+# stop once the last searches hardly give anything new.
+#
+# A place scores (new_leads + prior_new_leads) / (visits + 1): places that were never searched get
+# the optimistic prior, places that were searched often without new leads sink to the bottom.
+
+
+class YieldModel:
+    """Persistent results/new leads/visits statistics per place, plus the yield of the current run."""
+
+    def __init__(self, path, prior_new_leads=5.0, window=10, min_yield=None):
+        self.path = path
+        self.prior_new_leads = prior_new_leads
+        self.min_yield = min_yield
+        self.recent_yields = deque(maxlen=window)
+        self.places = {}
+        self.in_progress = {}
+        self.lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.places = json.load(f)
+
+    def _stats(self, place):
+        return self.places.setdefault(place, {"visits": 0, "results": 0, "new_leads": 0, "last_visit": None})
+
+    def score(self, place):
+        """Expected number of new leads from searching place once more."""
+        stats = self.places.get(place)
+        if stats is None:
+            return self.prior_new_leads
+        return (stats["new_leads"] + self.prior_new_leads) / (stats["visits"] + 1)
+
+    def order(self, places):
+        """The places sorted from highest to lowest score; places with equal scores keep their order."""
+        with self.lock:
+            return sorted(places, key=self.score, reverse=True)
+
+    def start_visit(self, place):
+        with self.lock:
+            self.in_progress[place] = {"results": 0, "new_leads_before": self._stats(place)["new_leads"]}
+
+    def count_results(self, place, count):
+        """Record the number of results the search for place listed."""
+        with self.lock:
+            if place in self.in_progress:
+                self.in_progress[place]["results"] += count
+
+    def count_new_lead(self, place):
+        """Record a lead from place that wasn't saved before."""
+        with self.lock:
+            self._stats(place)["new_leads"] += 1
+
+    def finish_visit(self, place):
+        """Close the visit to place, save the model and return the number of new leads it gave."""
+        with self.lock:
+            visit = self.in_progress.pop(place, {"results": 0, "new_leads_before": self._stats(place)["new_leads"]})
+            stats = self._stats(place)
+            stats["visits"] += 1
+            stats["results"] += visit["results"]
+            stats["last_visit"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            new_leads = stats["new_leads"] - visit["new_leads_before"]
+            self.recent_yields.append(new_leads)
+            self._save()
+        return new_leads
+
+    def should_stop(self):
+        """True when the last `window` places together gave fewer than min_yield new leads per place."""
+        with self.lock:
+            if self.min_yield is None or len(self.recent_yields) < self.recent_yields.maxlen:
+                return False
+            return sum(self.recent_yields) / len(self.recent_yields) < self.min_yield
+
+    def marginal_yield(self):
+        """Average number of new leads per place over the last `window` places of this run."""
+        with self.lock:
+            return sum(self.recent_yields) / len(self.recent_yields) if self.recent_yields else None
+
+    def _save(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.places, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)